@@ -0,0 +1,16 @@
+"""Make the repository importable as ``xpenseit`` when run as ``python bench/<script>.py``."""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import xpenseit  # noqa: F401
+except ImportError:
+    spec = importlib.util.spec_from_file_location(
+        "xpenseit", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["xpenseit"] = module
+    spec.loader.exec_module(module)
@@ -0,0 +1,118 @@
+"""Synthetic inputs and measurement helpers shared by the bench scripts."""
+from __future__ import annotations
+
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Sequence
+
+import _setup  # noqa: F401
+
+
+def synthetic_receipt(width: int = 3024, height: int = 4032, seed: int = 0, fmt: str = "JPEG", color: bool = True) -> bytes:
+    """Phone-photo-like receipt: off-white paper, rows of dark "text" bars, a colored logo, sensor noise."""
+    from PIL import Image, ImageDraw
+
+    rnd = random.Random(seed)
+    img = Image.new("RGB", (width, height), (236, 232, 222))
+    draw = ImageDraw.Draw(img)
+    margin, line = width // 10, max(8, height // 60)
+    if color:
+        draw.ellipse((margin, margin, margin + width // 5, margin + width // 5), fill=(200, 40, 40))
+    y = margin + width // 4
+    while y < height - margin:
+        x = margin
+        while x < width - margin:
+            w = rnd.randint(line, line * 5)
+            draw.rectangle((x, y, min(x + w, width - margin), y + line // 2), fill=(30, 30, 30))
+            x += w + line // 2
+        y += line
+    noise = Image.effect_noise((width, height), 12).convert("RGB")
+    img = Image.blend(img, noise, 0.08)
+    out = BytesIO()
+    img.save(out, format=fmt, quality=92) if fmt == "JPEG" else img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def synthetic_pdf(pages: int = 60, seed: int = 0) -> bytes:
+    """Folio-like PDF: a text block plus one embedded receipt photo per page."""
+    import fitz
+
+    photo = synthetic_receipt(900, 1200, seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Hotel folio page {i + 1}\nRoom charge 120.00\nTotal 135.00", fontsize=11)
+        page.insert_image(fitz.Rect(72, 140, 372, 540), stream=photo)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def peak_rss_mb() -> float:
+    """Process high-water RSS in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def child(script: str, args: Sequence[str]) -> Dict[str, Any]:
+    """Run ``script --child <args>`` in a fresh interpreter so peak RSS is per mode."""
+    proc = subprocess.run([sys.executable, script, "--child", *args], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def emit(result: Dict[str, Any]) -> None:
+    print(json.dumps(result))
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    widths = [max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns]
+    print("  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for r in rows:
+        print("  ".join(_fmt(r.get(c)).rjust(w) for c, w in zip(columns, widths)))
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.3f}" if value < 100 else f"{value:,.1f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def synthetic_frame(rows: int, seed: int = 0):
+    """Expense table shaped like ``ExpenseEntry.to_row()`` output."""
+    import numpy as np
+    import pandas as pd
+
+    from xpenseit.models import DEFAULT_CATEGORIES, DEFAULT_PAYMENT_METHODS
+
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+    return pd.DataFrame(
+        {
+            "ID": [f"{i:08x}-bench" for i in range(rows)],
+            "Merchant": [f"Merchant {i % 997}" for i in range(rows)],
+            "Date": days.strftime("%Y-%m-%d"),
+            "Time": [f"{h:02d}:{m:02d}" for h, m in zip(rng.integers(0, 24, rows), rng.integers(0, 60, rows))],
+            "Total": rng.uniform(1, 5000, rows).round(2),
+            "Currency": rng.choice(["USD", "MXN"], rows),
+            "Payment Method": rng.choice(DEFAULT_PAYMENT_METHODS, rows),
+            "Category": rng.choice(DEFAULT_CATEGORIES, rows),
+            "Notes": "",
+            "Source": [f"receipt_{i}.jpg" for i in range(rows)],
+        }
+    )
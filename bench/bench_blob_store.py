@@ -0,0 +1,77 @@
+"""
+Memory held per 1000 receipts: images inline on ExpenseEntry vs BlobStore
+references, with 20% duplicate images.
+
+    python bench/bench_blob_store.py [--receipts 1000] [--dup 0.2]
+
+Each mode runs in a fresh interpreter; "held MB" is RSS growth while the
+entries are alive.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import tempfile
+
+from _util import child, emit, synthetic_receipt, table
+
+from xpenseit.models import ExpenseEntry
+from xpenseit.services.blob_store import BlobStore
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run_mode(mode: str, receipts: int, dup: float, workdir: str) -> None:
+    distinct = max(1, int(receipts * (1 - dup)))
+    # Small base images keep generation quick; each distinct receipt gets its own ~230 KB payload.
+    base = [synthetic_receipt(900, 1200, seed=i) for i in range(8)]
+    store = BlobStore(os.path.join(workdir, "blobs")) if mode == "blob store" else None
+    gc.collect()
+    before = current_rss_mb()
+    entries = []
+    for i in range(receipts):
+        k = i % distinct
+        data = base[k % len(base)] + k.to_bytes(4, "big")  # unique bytes per distinct image
+        entry = ExpenseEntry(merchant_name=f"M{i}", total_amount=float(i))
+        entry.attach_image(data, store)
+        entries.append(entry)
+        del data
+    gc.collect()
+    held = current_rss_mb() - before
+    blobs = [name for _, _, names in os.walk(store.root) for name in names] if store else []
+    emit(
+        {
+            "mode": mode,
+            "receipts": receipts,
+            "held MB": held,
+            "KB/receipt": held * 1024 / receipts,
+            "blobs": len(blobs),
+            "disk MB": sum(store.size(b) for b in blobs) / 2**20 if store else 0.0,
+        }
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=1000)
+    ap.add_argument("--dup", type=float, default=0.2, help="Fraction of receipts repeating an earlier image")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        run_mode(args.child, args.receipts, args.dup, args.workdir)
+        return
+    rows = []
+    for mode in ("inline", "blob store"):
+        with tempfile.TemporaryDirectory() as workdir:
+            opts = ["--receipts", str(args.receipts), "--dup", str(args.dup), "--workdir", workdir]
+            rows.append(child(__file__, [mode, *opts]))
+    table(rows, ["mode", "receipts", "held MB", "KB/receipt", "blobs", "disk MB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+convert_many vs a scalar convert() loop over synthetic rows.
+
+    python bench/bench_convert.py [--rows 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from _util import table
+
+from xpenseit.services.currency import convert, convert_many
+
+
+RATES = {"USD": 1.0, "MXN": 18.0, "EUR": 0.92, "CAD": 1.36, "GBP": 0.79}
+CODES = np.array(["usd", "MXN", "EUR", "cad", "GBP", "XXX"], dtype=object)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(1, 5000, args.rows)
+    codes = CODES[rng.integers(0, len(CODES), args.rows)]
+
+    started = time.perf_counter()
+    scalar = [convert(a, c, "USD", RATES) for a, c in zip(amounts.tolist(), codes.tolist())]
+    scalar_secs = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vector = convert_many(amounts, codes, "USD", RATES)
+    vector_secs = time.perf_counter() - started
+
+    assert np.allclose(vector, scalar)
+    rows = [
+        {"impl": "scalar loop", "seconds": scalar_secs, "Mrows/s": args.rows / scalar_secs / 1e6},
+        {"impl": "convert_many", "seconds": vector_secs, "Mrows/s": args.rows / vector_secs / 1e6},
+    ]
+    print(f"{args.rows:,} rows, {len(CODES)} codes (one unknown); speedup {scalar_secs / vector_secs:.1f}x")
+    table(rows, ["impl", "seconds", "Mrows/s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput of currency inference over Vision-style values and receipt text.
+
+    python bench/bench_currency.py [--n 100000]
+
+"value" runs infer_currency on reported currency values with a merchant hint,
+against the symbol-to-USD helper it replaced; "text" runs find_currency over
+multi-line receipt text (symbol scan, ambiguity resolution and country hints).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import _setup  # noqa: F401
+from xpenseit.services.normalize import find_currency, infer_currency
+
+
+VALUES = ["USD", "usd", "MXN", "$", "MX$", "M.N.", "€", "EUR", "R$", "S/", "¥", "kr", "Pesos", "", None]
+MERCHANTS = ["Starbucks", "OXXO S.A. de C.V.", "Cafe Toronto", "Ramen Tokyo", "Norge Kiosk", "Pemex Guadalajara", None]
+TOTALS = ["$ {v:.2f}", "MX${v:,.2f}", "{v:.2f} M.N.", "{v:.2f} €", "£{v:.2f}", "S/ {v:.2f}", "R$ {v:.2f}", "{v:.2f}"]
+
+
+def legacy_currency(value, text=None):
+    if not value:
+        return "USD"
+    s = str(value).upper().strip()
+    if len(s) == 1:
+        return {"$": "USD"}.get(s, "USD")
+    return s
+
+
+def receipt_text(rnd: random.Random) -> str:
+    v = rnd.uniform(1, 5000)
+    lines = [rnd.choice([m for m in MERCHANTS if m]), f"Ticket {rnd.randint(1000, 99999)}"]
+    lines += [f"Item/Qty {i} {rnd.uniform(1, 200):.2f}" for i in range(rnd.randint(2, 8))]
+    lines.append("Total " + rnd.choice(TOTALS).format(v=v))
+    return "\n".join(lines)
+
+
+def timed(fn, args):
+    started = time.perf_counter()
+    for a in args:
+        fn(*a)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    args = ap.parse_args()
+    rnd = random.Random(7)
+    values = [(rnd.choice(VALUES), rnd.choice(MERCHANTS)) for _ in range(args.n)]
+    texts = [(receipt_text(rnd),) for _ in range(args.n)]
+    mean_chars = sum(len(t) for (t,) in texts) / len(texts)
+    print(f"{args.n:,} inputs per field; receipt text averages {mean_chars:.0f} chars")
+    print(f"{'field':6} {'impl':8} {'seconds':>8} {'us/item':>8}")
+    for field, inputs, impls in (
+        ("value", values, (("infer", infer_currency), ("legacy", legacy_currency))),
+        ("text", texts, (("find", find_currency),)),
+    ):
+        for name, fn in impls:
+            secs = timed(fn, inputs)
+            print(f"{field:6} {name:8} {secs:8.3f} {secs / len(inputs) * 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+get_download_bytes timings on a 10k-row frame: cold build of every format,
+a single requested format, cached reruns, and a rerun after an edit.
+
+    python bench/bench_exports.py [--rows 10000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from _util import synthetic_frame, table
+
+from xpenseit.models import ReportHeader
+from xpenseit.services import exports
+from xpenseit.services.exports import get_download_bytes
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    out = fn()
+    return {"call": label, "ms": (time.perf_counter() - started) * 1000, "KB": sum(map(len, out.values())) / 1024}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    args = ap.parse_args()
+    df = synthetic_frame(args.rows)
+    header = ReportHeader(reporter_name="Bench")
+
+    rows = []
+    exports._EXPORT_CACHE.clear()
+    rows.append(timed("all formats, cold", lambda: get_download_bytes(df, header)))
+    rows.append(timed("all formats, unchanged rerun", lambda: get_download_bytes(df, header)))
+    for fmt in exports.EXPORT_FORMATS:
+        exports._EXPORT_CACHE.clear()
+        rows.append(timed(f"{fmt} only, cold", lambda: get_download_bytes(df, header, formats=[fmt])))
+    edited = df.copy()
+    edited.loc[0, "Total"] = edited.loc[0, "Total"] + 1
+    rows.append(timed("csv only, after one-cell edit", lambda: get_download_bytes(edited, header, formats=["csv"])))
+    print(f"{args.rows:,} rows")
+    table(rows, ["call", "ms", "KB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Gallery rerun cost with 200 receipts: full images for every entry vs paged,
+cached thumbnails.
+
+    python bench/bench_gallery.py [--receipts 200] [--page-size 12]
+
+Streamlit itself is not driven here. Each rerun does the server-side work of
+render_image_gallery, and every image handed to the browser is hashed the way
+Streamlit's media file manager does, so "ms" covers preparation plus hand-off
+and "MB sent" is the payload shipped per rerun.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import tempfile
+import time
+
+from _util import synthetic_receipt, table
+
+from xpenseit.models import ExpenseEntry
+from xpenseit.services.blob_store import BlobStore
+from xpenseit.services.thumbnails import ThumbnailCache
+
+
+def hand_off(data: bytes) -> int:
+    hashlib.md5(data).hexdigest()
+    return len(data)
+
+
+def rerun_full(entries, store):
+    return sum(hand_off(e.image_bytes(store)) for e in entries)
+
+
+def rerun_thumbnails(entries, store, cache, page_size, width=320):
+    return sum(
+        hand_off(cache.get(e._image_ref, width, lambda e=e: e.image_bytes(store))) for e in entries[:page_size]
+    )
+
+
+def timed(fn):
+    started = time.perf_counter()
+    sent = fn()
+    return (time.perf_counter() - started) * 1000, sent / 2**20
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=200)
+    ap.add_argument("--page-size", type=int, default=12)
+    args = ap.parse_args()
+    base = [synthetic_receipt(3024, 4032, seed=i) for i in range(4)]
+    with tempfile.TemporaryDirectory() as workdir:
+        store = BlobStore(workdir)
+        entries = []
+        for i in range(args.receipts):
+            entry = ExpenseEntry(merchant_name=f"M{i}")
+            entry.attach_image(base[i % len(base)] + i.to_bytes(4, "big"), store)
+            entries.append(entry)
+        cache = ThumbnailCache()
+
+        rows = []
+        for name, fn in (
+            ("full images, all entries", lambda: rerun_full(entries, store)),
+            ("thumbnails, first rerun", lambda: rerun_thumbnails(entries, store, cache, args.page_size)),
+            ("thumbnails, next rerun", lambda: rerun_thumbnails(entries, store, cache, args.page_size)),
+        ):
+            ms, sent = timed(fn)
+            rows.append({"rerun": name, "ms": ms, "MB sent": sent})
+    print(f"{args.receipts} receipts (12 MP), page size {args.page_size}")
+    table(rows, ["rerun", "ms", "MB sent"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Vision payload size and encode time before/after prepare_image.
+
+    python bench/bench_image_prep.py [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+
+from _util import best_of, synthetic_pdf, synthetic_receipt, table
+
+from xpenseit.services.image_prep import prepare_image
+from xpenseit.services.pdf_utils import iter_pdf_images
+
+
+def inputs():
+    yield "12MP phone JPEG", synthetic_receipt(3024, 4032, seed=1)
+    yield "12MP phone JPEG (b/w)", synthetic_receipt(3024, 4032, seed=2, color=False)
+    yield "200-DPI PDF page PNG", next(iter_pdf_images(synthetic_pdf(1), dpi=200))
+    yield "small PNG screenshot", synthetic_receipt(600, 900, seed=3, fmt="PNG")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-edge", type=int, default=1600)
+    args = ap.parse_args()
+
+    rows = []
+    for name, data in inputs():
+        rows.append({"input": name, "mode": "raw", "KB": len(data) / 1024, "saved %": 0.0, "encode ms": 0.0, "mime": "-"})
+        for fmt in ("JPEG", "WEBP"):
+            prepared = prepare_image(data, max_edge=args.max_edge, fmt=fmt)
+            secs = best_of(lambda: prepare_image(data, max_edge=args.max_edge, fmt=fmt), args.repeat)
+            rows.append(
+                {
+                    "input": name,
+                    "mode": fmt,
+                    "KB": len(prepared.data) / 1024,
+                    "encode ms": secs * 1000,
+                    "mime": prepared.mime,
+                    "saved %": 100.0 * prepared.bytes_saved / len(data),
+                }
+            )
+    table(rows, ["input", "mode", "KB", "saved %", "encode ms", "mime"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: precompiled normalizers vs the strptime/try-except loops they replaced.
+
+    python bench/bench_normalize.py [--n 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+import _setup  # noqa: F401
+from xpenseit.services.normalize import parse_amount, parse_date, parse_time
+
+
+def legacy_date(value):
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except Exception:
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%m-%d-%Y"):
+            try:
+                return datetime.strptime(str(value), fmt).date()
+            except Exception:
+                continue
+        return None
+
+
+def legacy_amount(value):
+    try:
+        return float(str(value).replace(",", ""))
+    except Exception:
+        return None
+
+
+def legacy_time(value):
+    parts = str(value).strip().split(":")
+    if len(parts) >= 2 and all(p.isdigit() for p in parts[:2]):
+        return f"{int(parts[0]) % 24:02d}:{int(parts[1]) % 60:02d}"
+    return None
+
+
+def sample(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    dates, amounts, times = [], [], []
+    for _ in range(n):
+        y, m, d = rnd.randint(2018, 2026), rnd.randint(1, 12), rnd.randint(1, 28)
+        dates.append(rnd.choice([f"{y}-{m:02d}-{d:02d}", f"{d:02d}/{m:02d}/{y}", f"{m:02d}-{d:02d}-{y}", f"{d} Mar {y}"]))
+        v = rnd.uniform(1, 20000)
+        amounts.append(rnd.choice([f"{v:,.2f}", f"${v:.2f}", f"MX${v:,.2f}", f"{v:.2f}".replace(".", ",")]))
+        hh, mm = rnd.randint(0, 23), rnd.randint(0, 59)
+        times.append(rnd.choice([f"{hh:02d}:{mm:02d}", f"{hh % 12 or 12}:{mm:02d} pm", f"{hh:02d}:{mm:02d}:00"]))
+    return dates, amounts, times
+
+
+def timed(fn, values):
+    started = time.perf_counter()
+    parsed = sum(fn(v) is not None for v in values)
+    return time.perf_counter() - started, parsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    args = ap.parse_args()
+    dates, amounts, times = sample(args.n)
+    print(f"{args.n:,} strings per field")
+    print(f"{'field':8} {'impl':8} {'seconds':>8} {'ns/str':>8} {'parsed':>8}")
+    # "amount*" is the subset the legacy float() parse handles, for a like-for-like comparison.
+    plain = [v for v in amounts if legacy_amount(v) is not None]
+    for field, values, new, old in (
+        ("date", dates, parse_date, legacy_date),
+        ("amount", amounts, parse_amount, legacy_amount),
+        ("amount*", plain, parse_amount, legacy_amount),
+        ("time", times, parse_time, legacy_time),
+    ):
+        for name, fn in (("regex", new), ("legacy", old)):
+            secs, parsed = timed(fn, values)
+            print(f"{field:8} {name:8} {secs:8.3f} {secs / len(values) * 1e9:8.0f} {parsed:8,}")
+
+
+if __name__ == "__main__":
+    main()
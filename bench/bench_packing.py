@@ -0,0 +1,128 @@
+"""
+Single-image vs packed Vision requests against a local stub endpoint.
+
+    python bench/bench_packing.py [--receipts 48] [--packs 1,4,8] [--latency 0.4]
+
+The stub answers like chat completions: each request costs ``--latency`` seconds
+plus ``--per-image`` per receipt and reports token usage from the prompt size
+(4 chars per token, ``--image-tokens`` per image). Rows are usage_stats() per
+run plus wall time, so prompt amortization and per-receipt latency can be read
+off directly. Numbers depend on the stub's cost model, not on a real model.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _util import synthetic_receipt, table
+
+from xpenseit.services import openai_vision
+from xpenseit.services.openai_vision import extract_many, usage_stats
+from xpenseit.services.scheduler import RequestScheduler
+
+
+FIELDS = {
+    "merchant_name": "Cafe Sol",
+    "transaction_date": "2025-03-12",
+    "transaction_time": "14:05",
+    "total_amount": 12.5,
+    "currency_code": "USD",
+    "payment_method": "Cash",
+    "category": "Food & Meals",
+}
+
+
+def serve(latency: float, per_image: float, image_tokens: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            content = request["messages"][0]["content"]
+            images = sum(part["type"] == "image_url" for part in content)
+            text = sum(len(part["text"]) for part in content if part["type"] == "text")
+            time.sleep(latency + per_image * images)
+            if images == 1:
+                reply = json.dumps(FIELDS)
+            else:
+                reply = json.dumps([{"index": i, **FIELDS} for i in range(images)])
+            body = json.dumps(
+                {
+                    "id": "bench",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": request["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}],
+                    "usage": {
+                        "prompt_tokens": math.ceil(text / 4) + image_tokens * images,
+                        "completion_tokens": math.ceil(len(reply) / 4),
+                        "total_tokens": math.ceil(text / 4) + image_tokens * images + math.ceil(len(reply) / 4),
+                    },
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=48)
+    ap.add_argument("--packs", default="1,4,8")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.4, help="Stub seconds per request")
+    ap.add_argument("--per-image", type=float, default=0.05, help="Stub seconds per receipt in a request")
+    ap.add_argument("--image-tokens", type=int, default=765, help="Stub prompt tokens per image")
+    args = ap.parse_args()
+    server = serve(args.latency, args.per_image, args.image_tokens)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    images = [(synthetic_receipt(600, 800, seed=i), f"r{i}.jpg") for i in range(args.receipts)]
+    rows = []
+    try:
+        for pack in (int(p) for p in args.packs.split(",")):
+            openai_vision._USAGE.clear()
+            started = time.perf_counter()
+            results = extract_many(
+                images,
+                base_url=url,
+                api_key="bench",
+                concurrency=args.concurrency,
+                pack_size=pack,
+                scheduler=RequestScheduler(),
+            )
+            wall = time.perf_counter() - started
+            assert all(r["error"] is None for r in results)
+            for mode, stats in usage_stats().items():
+                rows.append(
+                    {
+                        "pack": pack,
+                        "mode": mode,
+                        "requests": stats["requests"],
+                        "wall s": wall,
+                        "s/receipt": stats["seconds_per_receipt"],
+                        "tokens/receipt": stats["tokens_per_receipt"],
+                        "fallbacks": stats["fallbacks"],
+                    }
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"{args.receipts} receipts, concurrency {args.concurrency}; stub {args.latency}s + {args.per_image}s/image")
+    table(rows, ["pack", "mode", "requests", "wall s", "s/receipt", "tokens/receipt", "fallbacks"])
+
+
+if __name__ == "__main__":
+    main()
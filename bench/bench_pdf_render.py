@@ -0,0 +1,61 @@
+"""
+Pages/sec and memory high-water mark for PDF page rendering modes.
+
+    python bench/bench_pdf_render.py [--pages 60] [--dpi 200] [--workers 4]
+
+Each mode runs in a fresh interpreter; "peak MB" is the RSS high-water mark
+added by rendering, on top of building the synthetic folio.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from _util import child, emit, peak_rss_mb, synthetic_pdf, table
+
+from xpenseit.services.pdf_utils import iter_pdf_images, pdf_to_images
+
+
+def run_mode(mode: str, pages: int, dpi: int, workers: int) -> None:
+    pdf = synthetic_pdf(pages)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "list":
+        rendered = pdf_to_images(pdf, dpi=dpi)
+        total = sum(len(p) for p in rendered)
+    elif mode == "generator":
+        total = sum(len(p) for p in iter_pdf_images(pdf, dpi=dpi))
+    else:
+        rendered = pdf_to_images(pdf, dpi=dpi, workers=workers)
+        total = sum(len(p) for p in rendered)
+    secs = time.perf_counter() - started
+    emit(
+        {
+            "mode": mode if mode != "pool" else f"pool x{workers}",
+            "pages/s": pages / secs,
+            "seconds": secs,
+            "peak MB": peak_rss_mb() - baseline,
+            "PNG MB": total / 2**20,
+        }
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=60)
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        run_mode(args.child, args.pages, args.dpi, args.workers)
+        return
+    opts = ["--pages", str(args.pages), "--dpi", str(args.dpi), "--workers", str(args.workers)]
+    rows = [child(__file__, [mode, *opts]) for mode in ("list", "generator", "pool")]
+    print(f"{args.pages} pages at {args.dpi} DPI")
+    table(rows, ["mode", "pages/s", "seconds", "peak MB", "PNG MB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+PDF output size and write time with receipts embedded at full resolution vs
+resampled to a print DPI, optionally grayscale.
+
+    python bench/bench_report_dpi.py [--receipts 30]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+
+from _util import synthetic_receipt, table
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.report_pdf import build_pdf_report
+
+
+SETTINGS = [
+    ("full resolution", None, False),
+    ("200 DPI", 200, False),
+    ("150 DPI", 150, False),
+    ("150 DPI gray", 150, True),
+    ("100 DPI", 100, False),
+]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=30)
+    args = ap.parse_args()
+    entries = []
+    for i in range(args.receipts):
+        entry = ExpenseEntry(merchant_name=f"M{i}", transaction_date=date(2025, 1, 1), total_amount=1.0)
+        entry.attach_image(synthetic_receipt(3024, 4032, seed=i))
+        entries.append(entry)
+    header = ReportHeader(reporter_name="Bench")
+
+    rows = []
+    for name, dpi, gray in SETTINGS:
+        started = time.perf_counter()
+        pdf = build_pdf_report(header, entries, 18.0, None, image_dpi=dpi, grayscale_receipts=gray)
+        rows.append({"images": name, "PDF MB": len(pdf) / 2**20, "seconds": time.perf_counter() - started})
+    full = rows[0]["PDF MB"]
+    for row in rows:
+        row["vs full"] = f"{row['PDF MB'] / full:.0%}"
+    print(f"{args.receipts} receipts, 12 MP each")
+    table(rows, ["images", "PDF MB", "vs full", "seconds"])
+
+
+if __name__ == "__main__":
+    main()
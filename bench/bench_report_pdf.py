@@ -0,0 +1,90 @@
+"""
+Peak RSS and build time of build_pdf_report for 100/500/1000 receipts.
+
+    python bench/bench_report_pdf.py [--counts 100,500,1000] [--distinct 25]
+
+"bytes" builds into memory (output=None) from entries holding their images
+inline; "file" streams to a path with receipts read lazily from a BlobStore.
+Every run uses a fresh interpreter. "build MB" is the high-water mark added by
+the build itself, "peak MB" the process total including the entries.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+from _util import child, emit, peak_rss_mb, synthetic_receipt, table
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.blob_store import BlobStore
+from xpenseit.services.report_pdf import build_pdf_report
+
+
+def make_entries(count: int, distinct: int, store: BlobStore, inline: bool):
+    images = [synthetic_receipt(1200, 1600, seed=i) for i in range(distinct)]
+    entries = []
+    for i in range(count):
+        entry = ExpenseEntry(
+            merchant_name=f"Merchant {i}",
+            transaction_date=date(2025, 1, 1 + i % 28),
+            total_amount=10.0 + i,
+            currency_code="USD" if i % 3 else "MXN",
+            category="Food & Meals",
+        )
+        # Copies, so inline entries really hold one buffer each as session state would.
+        entry.attach_image(bytes(bytearray(images[i % distinct])), None if inline else store)
+        entries.append(entry)
+    return entries
+
+
+def run_mode(mode: str, count: int, distinct: int, workdir: str) -> None:
+    store = BlobStore(os.path.join(workdir, "blobs"))
+    entries = make_entries(count, distinct, store, inline=mode == "bytes")
+    baseline = peak_rss_mb()
+    header = ReportHeader(reporter_name="Bench", trip_purpose="benchmark")
+    started = time.perf_counter()
+    if mode == "bytes":
+        size = len(build_pdf_report(header, entries, 18.0, None))
+    else:
+        path = os.path.join(workdir, "report.pdf")
+        build_pdf_report(header, entries, 18.0, None, output=path, blob_store=store)
+        size = os.path.getsize(path)
+    secs = time.perf_counter() - started
+    peak = peak_rss_mb()
+    emit(
+        {
+            "receipts": count,
+            "mode": mode,
+            "seconds": secs,
+            "build MB": peak - baseline,
+            "peak MB": peak,
+            "PDF MB": size / 2**20,
+        }
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", default="100,500,1000")
+    ap.add_argument("--distinct", type=int, default=25, help="Distinct synthetic receipt images")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--count", type=int, default=100, help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        run_mode(args.child, args.count, args.distinct, args.workdir)
+        return
+    rows = []
+    for count in (int(c) for c in args.counts.split(",")):
+        for mode in ("bytes", "file"):
+            with tempfile.TemporaryDirectory() as workdir:
+                opts = ["--count", str(count), "--distinct", str(args.distinct), "--workdir", workdir]
+                rows.append(child(__file__, [mode, *opts]))
+    table(rows, ["receipts", "mode", "seconds", "build MB", "peak MB", "PDF MB"])
+
+
+if __name__ == "__main__":
+    main()
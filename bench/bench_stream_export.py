@@ -0,0 +1,95 @@
+"""
+Peak RSS of CSV/JSON export for large batches: streamed chunks vs in-memory bytes.
+
+    python bench/bench_stream_export.py [--rows 100000,500000]
+
+Each run holds the rows in an ExpenseStore (as the app and CLI already hold their
+entries) and writes the export to a temp file in a fresh interpreter. "stream"
+uses iter_csv / iter_ndjson + write_chunks, "buffered" builds a DataFrame and
+the file bytes with get_download_bytes. "export MB" is the high-water mark
+added by the export itself; flat across row counts means bounded memory.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+from _util import child, emit, peak_rss_mb, synthetic_frame, table
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.exports import get_download_bytes
+from xpenseit.services.stream_export import iter_csv, iter_ndjson, write_chunks
+from xpenseit.store import ExpenseStore
+
+
+def make_store(rows: int) -> ExpenseStore:
+    df = synthetic_frame(rows)
+    return ExpenseStore(
+        (
+            ExpenseEntry.model_construct(
+                id=r.ID,
+                merchant_name=r.Merchant,
+                transaction_time=r.Time,
+                total_amount=r.Total,
+                currency_code=r.Currency,
+                category=r.Category,
+                source_name=r.Source,
+            )
+            for r in df.itertuples(index=False)
+        ),
+        capacity=rows,
+    )
+
+
+def run_mode(mode: str, fmt: str, rows: int, workdir: str) -> None:
+    store = make_store(rows)
+    baseline = peak_rss_mb()
+    path = os.path.join(workdir, f"expenses.{fmt}")
+    started = time.perf_counter()
+    if mode == "stream":
+        write_chunks((iter_csv if fmt == "csv" else iter_ndjson)(store), path)
+    else:
+        df = pd.DataFrame(list(store.iter_rows()))
+        data = get_download_bytes(df, ReportHeader(), formats=[fmt])[fmt]
+        with open(path, "wb") as fh:
+            fh.write(data)
+    secs = time.perf_counter() - started
+    peak = peak_rss_mb()
+    emit(
+        {
+            "rows": rows,
+            "format": fmt if mode == "buffered" else {"csv": "csv", "json": "ndjson"}[fmt],
+            "mode": mode,
+            "seconds": secs,
+            "export MB": peak - baseline,
+            "file MB": os.path.getsize(path) / 2**20,
+        }
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="100000,500000")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--format", default="csv", help=argparse.SUPPRESS)
+    ap.add_argument("--count", type=int, default=0, help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        run_mode(args.child, args.format, args.count, args.workdir)
+        return
+    results = []
+    for rows in (int(r) for r in args.rows.split(",")):
+        for fmt in ("csv", "json"):
+            for mode in ("buffered", "stream"):
+                with tempfile.TemporaryDirectory() as workdir:
+                    opts = ["--format", fmt, "--count", str(rows), "--workdir", workdir]
+                    results.append(child(__file__, [mode, *opts]))
+    table(results, ["rows", "format", "mode", "seconds", "export MB", "file MB"])
+
+
+if __name__ == "__main__":
+    main()
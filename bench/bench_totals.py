@@ -0,0 +1,86 @@
+"""
+Scaling of the shared totals engine with entry count, against a per-entry loop.
+
+    python bench/bench_totals.py [--counts 1000,10000,100000]
+
+"entries" times totals_for_entries on ExpenseEntry objects (column extraction
+included), "frame" times totals_for_frame on the equivalent to_row() table, both
+with per-category and per-date groupings. A flat "us/entry" across counts is
+linear scaling.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from _util import best_of, table
+
+from xpenseit.models import DEFAULT_CATEGORIES, ExpenseEntry, ReportHeader
+from xpenseit.services.totals import header_rates, totals_for_entries, totals_for_frame
+
+
+RATES = {"EUR": 0.92, "CAD": 1.36, "GBP": 0.79}
+CODES = ["USD", "MXN", "EUR", "CAD", "GBP", "XXX"]
+
+
+def make_entries(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(1, 5000, count).round(2).tolist()
+    codes = rng.integers(0, len(CODES), count).tolist()
+    cats = rng.integers(0, len(DEFAULT_CATEGORIES), count).tolist()
+    days = rng.integers(0, 365, count).tolist()
+    start = date(2025, 1, 1)
+    return [
+        ExpenseEntry.model_construct(
+            total_amount=a,
+            currency_code=CODES[c],
+            category=DEFAULT_CATEGORIES[k],
+            transaction_date=start + timedelta(days=d),
+        )
+        for a, c, k, d in zip(amounts, codes, cats, days)
+    ]
+
+
+def loop_totals(entries, header: ReportHeader):
+    """Per-entry dict accumulation: the shape of the code the engine replaced."""
+    rates = header_rates(header.fx_usd_to_mxn, RATES)
+    subtotals, by_category, by_date = {}, {}, {}
+    for e in entries:
+        code = e.currency_code.upper()
+        amount = e.total_amount or 0.0
+        subtotals[code] = subtotals.get(code, 0.0) + amount
+        if code in rates:
+            base = amount / rates[code] * rates[header.base_currency]
+            by_category[e.category] = by_category.get(e.category, 0.0) + base
+            day = e.transaction_date.isoformat()
+            by_date[day] = by_date.get(day, 0.0) + base
+    return subtotals, by_category, by_date
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", default="1000,10000,100000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    header = ReportHeader(reporter_name="Bench")
+    groupings = {"by_category": True, "by_date": True}
+    rows = []
+    for count in (int(c) for c in args.counts.split(",")):
+        entries = make_entries(count)
+        df = pd.DataFrame([e.to_row() for e in entries])
+        expected = totals_for_entries(entries, header, rates=RATES, **groupings)
+        assert totals_for_frame(df, header, rates=RATES, **groupings).totals == expected.totals
+        for impl, fn in (
+            ("loop", lambda: loop_totals(entries, header)),
+            ("entries", lambda: totals_for_entries(entries, header, rates=RATES, **groupings)),
+            ("frame", lambda: totals_for_frame(df, header, rates=RATES, **groupings)),
+        ):
+            secs = best_of(fn, args.repeat)
+            rows.append({"entries": count, "impl": impl, "ms": secs * 1e3, "us/entry": secs / count * 1e6})
+    table(rows, ["entries", "impl", "ms", "us/entry"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Receipt transcoding speedup: serial loop vs thread pool, alone and inside
+build_pdf_report.
+
+    python bench/bench_transcode.py [--receipts 40] [--workers 1,2,4]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from _util import synthetic_receipt, table
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.report_pdf import RECEIPT_MAX_H, RECEIPT_MAX_W, _transcode_receipt, build_pdf_report
+
+
+def transcode(data: bytes) -> bytes:
+    # Full-resolution path (image_dpi=None), the step the pool parallelizes.
+    return _transcode_receipt(data, RECEIPT_MAX_W, RECEIPT_MAX_H)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=40)
+    ap.add_argument("--workers", default=f"1,2,{min(4, os.cpu_count() or 1) or 1}")
+    args = ap.parse_args()
+    worker_counts = sorted({int(w) for w in args.workers.split(",")})
+    images = [synthetic_receipt(2000, 2667, seed=i) for i in range(args.receipts)]
+    header = ReportHeader(reporter_name="Bench")
+    print(f"{args.receipts} receipts, {os.cpu_count()} CPUs")
+
+    rows = []
+    for workers in worker_counts:
+        started = time.perf_counter()
+        if workers == 1:
+            for data in images:
+                transcode(data)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(transcode, images))
+        transcode_secs = time.perf_counter() - started
+
+        entries = []
+        for i, data in enumerate(images):
+            entry = ExpenseEntry(merchant_name=f"M{i}", transaction_date=date(2025, 1, 1), total_amount=1.0)
+            entry.attach_image(data)
+            entries.append(entry)
+        started = time.perf_counter()
+        build_pdf_report(header, entries, 18.0, None, image_workers=workers, image_dpi=None)
+        build_secs = time.perf_counter() - started
+        rows.append({"workers": workers, "transcode s": transcode_secs, "report s": build_secs})
+
+    serial = rows[0]
+    for row in rows:
+        row["transcode x"] = serial["transcode s"] / row["transcode s"]
+        row["report x"] = serial["report s"] / row["report s"]
+    table(rows, ["workers", "transcode s", "transcode x", "report s", "report x"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+XLSX write time and peak memory for 100k rows across engines.
+
+    python bench/bench_xlsx.py [--rows 100000]
+
+Each engine runs in a fresh interpreter; "peak MB" is the RSS high-water mark
+added by the write, on top of building the frame.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from _util import child, emit, peak_rss_mb, synthetic_frame, table
+
+from xpenseit.models import ReportHeader
+from xpenseit.services import exports
+from xpenseit.services.exports import XLSX_ENGINES, get_download_bytes
+
+
+def run_engine(engine: str, rows: int) -> None:
+    df = synthetic_frame(rows)
+    header = ReportHeader(reporter_name="Bench")
+    baseline = peak_rss_mb()
+    exports._EXPORT_CACHE.clear()
+    started = time.perf_counter()
+    data = get_download_bytes(df, header, formats=["xlsx"], xlsx_engine=engine)["xlsx"]
+    secs = time.perf_counter() - started
+    emit({"engine": engine, "seconds": secs, "peak MB": peak_rss_mb() - baseline, "file MB": len(data) / 2**20})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        run_engine(args.child, args.rows)
+        return
+    rows = [child(__file__, [engine, "--rows", str(args.rows)]) for engine in XLSX_ENGINES]
+    print(f"{args.rows:,} rows")
+    table(rows, ["engine", "seconds", "peak MB", "file MB"])
+
+
+if __name__ == "__main__":
+    main()
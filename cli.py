@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, wait
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openai import OpenAIError
+from pydantic import ValidationError
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.blob_store import BlobStore
+from xpenseit.services.currency import RateCache, fetch_rates
+from xpenseit.services.exports import get_download_bytes
+from xpenseit.services.extraction_cache import ExtractionCache
+from xpenseit.services.journal import IngestJournal, file_key
+from xpenseit.services.normalize import DEFAULT_REGION, REGION_PRIORS, set_region
+from xpenseit.services.openai_vision import submit_many
+from xpenseit.services.pdf_text import iter_pdf_pages
+from xpenseit.services.pdf_utils import iter_pdf_images
+from xpenseit.services.report_pdf import build_pdf_report
+from xpenseit.services.scheduler import RequestScheduler
+from xpenseit.services.stream_export import iter_csv, iter_ndjson, write_chunks
+from xpenseit.services.totals import totals_for_entries
+
+
+# Row-streamed exports; other formats are built in memory by get_download_bytes.
+STREAM_EXPORTS = {"csv": iter_csv, "ndjson": iter_ndjson}
+OUTPUT_FORMATS = ("csv", "ndjson", "json", "xlsx", "parquet", "arrow")
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+PDF_EXTENSIONS = {".pdf"}
+
+# (fields or None when Vision is needed, image bytes or None, display name, journal file key, item index)
+_Item = Tuple[Optional[Dict[str, Any]], Optional[bytes], str, str, int]
+
+# Placeholder key for keyless local endpoints; the OpenAI client refuses to start without one.
+_LOCAL_API_KEY = "unused"
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def _formats(value: str) -> List[str]:
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in OUTPUT_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown format(s) {', '.join(unknown)}; choose from {', '.join(OUTPUT_FORMATS)}"
+        )
+    return formats
+
+
+def _scan(input_dir: str) -> List[str]:
+    paths = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            ext = os.path.splitext(name)[1].lower()
+            if ext in IMAGE_EXTENSIONS or ext in PDF_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _iter_items(path: str, name: str, key: str, args: argparse.Namespace) -> Iterator[_Item]:
+    """A file's items, rendered one page at a time as the pipeline asks for them."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if os.path.splitext(path)[1].lower() not in PDF_EXTENSIONS:
+        yield None, data, name, key, 0
+        return
+    if args.no_text_fastpath:
+        pages: Iterator[Tuple[Optional[Dict[str, Any]], Optional[bytes]]] = (
+            (None, image) for image in iter_pdf_images(data, dpi=args.dpi)
+        )
+    else:
+        pages = iter_pdf_pages(data, name, dpi=args.dpi, preview_dpi=args.preview_dpi)
+    for i, (fields, image) in enumerate(pages):
+        yield fields, image, name, key, i
+
+
+def _to_entry(fields: Dict[str, Any]) -> ExpenseEntry:
+    known = {k: v for k, v in fields.items() if k in ExpenseEntry.model_fields and v is not None}
+    return ExpenseEntry(**known)
+
+
+def _progress(done: int, total: int, started: float, stats: Dict[str, int]) -> None:
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"[{done}/{total} files] {stats['receipts']} receipts "
+        f"({stats['vision']} vision, {stats['text']} text-layer, {stats['resumed']} resumed, {stats['errors']} errors) "
+        f"{stats['receipts'] / elapsed:.2f} receipts/s",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _header(args: argparse.Namespace) -> ReportHeader:
+    return ReportHeader(
+        reporter_name=args.reporter,
+        report_date=date.today(),
+        trip_purpose=args.purpose,
+        client=args.client,
+        visit_type=args.visit_type,
+        base_currency=args.base_currency,
+        fx_usd_to_mxn=args.fx,
+    )
+
+
+def _api_key(args: argparse.Namespace) -> Optional[str]:
+    if args.api_key:
+        return args.api_key
+    if args.base_url and not os.environ.get("OPENAI_API_KEY"):
+        return _LOCAL_API_KEY
+    return None
+
+
+class _Pipeline:
+    """
+    Streams items into Vision with at most ``--concurrency`` requests in flight,
+    so only those receipts' images are in memory while the next page renders.
+    Every item is journaled as soon as its extraction finishes, and a file is
+    marked done once all of its items are recorded.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        cache: ExtractionCache,
+        store: BlobStore,
+        journal: IngestJournal,
+    ):
+        self.args = args
+        self.cache = cache
+        self.store = store
+        self.journal = journal
+        # One scheduler for the whole run, so rate buckets and the breaker carry across requests.
+        self.scheduler = RequestScheduler()
+        self.api_key = _api_key(args)
+        self.stats = {"receipts": 0, "vision": 0, "text": 0, "resumed": 0, "errors": 0}
+        # Input-order slots, filled as extractions complete.
+        self.entries: List[Optional[ExpenseEntry]] = []
+        self._group: List[Tuple[_Item, int]] = []
+        self._inflight: Dict[Future, List[Tuple[_Item, int]]] = {}
+        # Per file key: items not yet recorded, and the item count once the file is fully read.
+        self._open: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+
+    def replay(self, done: List[Dict[str, Any]]) -> None:
+        for fields in done:
+            entry = _to_entry(fields)
+            if fields.get("image_hash") and fields["image_hash"] in self.store:
+                entry._image_ref = fields["image_hash"]
+            self.entries.append(entry)
+        self.stats["resumed"] += len(done)
+        self.stats["receipts"] += len(done)
+
+    def add(self, item: _Item) -> None:
+        fields, _, _, key, _ = item
+        slot = len(self.entries)
+        self.entries.append(None)
+        self._open[key] = self._open.get(key, 0) + 1
+        if fields is not None:
+            self.stats["text"] += 1
+            self._record(item, slot, fields)
+            return
+        self._group.append((item, slot))
+        if len(self._group) >= self.args.pack_size:
+            self._submit()
+
+    def file_loaded(self, key: str, items: int) -> None:
+        self._sizes[key] = items
+        self._open.setdefault(key, 0)
+        self._maybe_done(key)
+
+    def finish(self) -> List[ExpenseEntry]:
+        if self._group:
+            self._submit()
+        while self._inflight:
+            self._collect(ALL_COMPLETED)
+        return [e for e in self.entries if e is not None]
+
+    def _submit(self) -> None:
+        while len(self._inflight) >= self.args.concurrency:
+            self._collect(FIRST_COMPLETED)
+        group, self._group = self._group, []
+        future = submit_many(
+            [(image, name) for (_, image, name, _, _), _ in group],
+            model=self.args.model,
+            concurrency=1,
+            base_url=self.args.base_url,
+            api_key=self.api_key,
+            cache=self.cache,
+            scheduler=self.scheduler,
+            pack_size=len(group),
+        )
+        self._inflight[future] = group
+
+    def _collect(self, return_when: str) -> None:
+        done, _ = wait(list(self._inflight), return_when=return_when)
+        for future in done:
+            group = self._inflight.pop(future)
+            for (item, slot), fields in zip(group, future.result()):
+                self.stats["vision"] += 1
+                if fields.get("error"):
+                    self.stats["errors"] += 1
+                    print(f"  {item[2]}: {fields['error']}", file=sys.stderr)
+                self._record(item, slot, fields)
+
+    def _record(self, item: _Item, slot: int, fields: Dict[str, Any]) -> None:
+        _, image, name, key, index = item
+        entry = _to_entry(fields)
+        if image is not None:
+            entry.attach_image(image, self.store)
+        # The id is journaled too, so a resumed run keeps the entry's ID in the exports.
+        self.journal.record_item(key, index, name, entry._image_ref, {**fields, "id": entry.id}, fields.get("error"))
+        self.entries[slot] = entry
+        self.stats["receipts"] += 1
+        self._open[key] -= 1
+        self._maybe_done(key)
+
+    def _maybe_done(self, key: str) -> None:
+        if key in self._sizes and self._open[key] == 0:
+            self.journal.mark_file_done(key, self._sizes.pop(key))
+            del self._open[key]
+
+
+def run(args: argparse.Namespace) -> int:
+    set_region(args.region)
+    # Validate the header before any extraction work, not after it.
+    try:
+        header = _header(args)
+    except ValidationError as ex:
+        print(f"Invalid report header: {ex}", file=sys.stderr)
+        return 1
+    files = _scan(args.input_dir)
+    if not files:
+        print(f"No images or PDFs found in {args.input_dir}", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    cache = ExtractionCache(args.cache or os.path.join(args.out, "extraction_cache.sqlite3"))
+    store = BlobStore(os.path.join(args.out, "blobs"))
+    journal = IngestJournal(args.journal or os.path.join(args.out, "journal.sqlite3"))
+    try:
+        return _process(args, header, files, cache, store, journal)
+    except OpenAIError as ex:
+        # Client configuration (e.g. no API key); finished items are already journaled.
+        print(f"Vision client error: {ex}", file=sys.stderr)
+        return 1
+    finally:
+        cache.close()
+        journal.close()
+
+
+def _process(
+    args: argparse.Namespace,
+    header: ReportHeader,
+    files: List[str],
+    cache: ExtractionCache,
+    store: BlobStore,
+    journal: IngestJournal,
+) -> int:
+    pipeline = _Pipeline(args, cache, store, journal)
+    stats = pipeline.stats
+    started = last_progress = time.perf_counter()
+    for done_files, path in enumerate(files, start=1):
+        name = os.path.relpath(path, args.input_dir)
+        key = file_key(path, name)
+        done = journal.completed_items(key)
+        if done is not None:
+            # Finished in an earlier run: replay from the journal, no read or render.
+            pipeline.replay(done)
+        else:
+            count = 0
+            try:
+                for item in _iter_items(path, name, key, args):
+                    pipeline.add(item)
+                    count += 1
+            except OpenAIError:
+                raise
+            except Exception as ex:
+                # Left without a done record, so the next run retries the file.
+                stats["errors"] += 1
+                print(f"  skipped {path}: {type(ex).__name__}: {ex}", file=sys.stderr)
+            else:
+                pipeline.file_loaded(key, count)
+        if time.perf_counter() - last_progress >= 1.0:
+            _progress(done_files, len(files), started, stats)
+            last_progress = time.perf_counter()
+    entries = pipeline.finish()
+    _progress(len(files), len(files), started, stats)
+
+    # The header's USD->MXN input always wins; live rates only fill in other currencies.
+    rates = fetch_rates("USD", RateCache(os.path.join(args.out, "fx_rates.json"))) if args.live_rates else None
+    totals = totals_for_entries(entries, header, rates=rates)
+    build_pdf_report(
+        header,
+        entries,
+        args.fx,
+        args.logo,
+        output=os.path.join(args.out, "report.pdf"),
+        totals=totals,
+        blob_store=store,
+    )
+    buffered = []
+    for fmt in args.formats:
+        if fmt in STREAM_EXPORTS:
+            # Written chunk by chunk, so memory does not grow with the row count.
+            write_chunks(STREAM_EXPORTS[fmt](entries), os.path.join(args.out, f"expenses.{fmt}"))
+        else:
+            buffered.append(fmt)
+    if buffered:
+        df = pd.DataFrame([e.to_row() for e in entries])
+        for fmt, data in get_download_bytes(df, header, totals=totals, formats=buffered).items():
+            with open(os.path.join(args.out, f"expenses.{fmt}"), "wb") as fh:
+                fh.write(data)
+
+    elapsed = time.perf_counter() - started
+    cache_stats = cache.stats()
+    print(
+        f"Done: {len(files)} files, {stats['receipts']} receipts in {elapsed:.1f}s "
+        f"({stats['receipts'] / max(elapsed, 1e-9):.2f} receipts/s); "
+        f"cache hits {cache_stats['hits']}, misses {cache_stats['misses']}; "
+        f"resumed {stats['resumed']} from journal; errors {stats['errors']}. Output in {args.out}",
+        file=sys.stderr,
+    )
+    return 0 if stats["errors"] == 0 else 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="xpenseit",
+        description="Extract expenses from a directory of receipt images/PDFs and build the report headlessly. "
+        "Progress is journaled, so re-running on the same directory skips finished files and only retries failures.",
+    )
+    p.add_argument("input_dir", help="Directory scanned recursively for images and PDFs")
+    p.add_argument("--out", default="xpenseit_out", help="Output directory (report, exports, cache, blobs)")
+    p.add_argument("--model", default="gpt-4o-mini")
+    p.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=8,
+        help="Vision requests in flight; also bounds how many rendered receipts are held in memory",
+    )
+    p.add_argument("--pack-size", type=_positive_int, default=1, help="Receipts packed into one Vision request")
+    p.add_argument("--base-url", default=None, help="Chat-completions endpoint override, e.g. a local fake server")
+    p.add_argument(
+        "--api-key",
+        default=None,
+        help="Vision API key (default: $OPENAI_API_KEY; a placeholder is sent to a keyless --base-url)",
+    )
+    p.add_argument("--cache", default=None, help="Extraction cache path (default: <out>/extraction_cache.sqlite3)")
+    p.add_argument("--journal", default=None, help="Ingestion journal path (default: <out>/journal.sqlite3)")
+    p.add_argument("--dpi", type=_positive_int, default=200, help="PDF render DPI for Vision")
+    p.add_argument("--preview-dpi", type=_positive_int, default=100, help="Render DPI for text-layer pages in the report")
+    p.add_argument("--no-text-fastpath", action="store_true", help="Send every PDF page to Vision")
+    p.add_argument(
+        "--region",
+        default=DEFAULT_REGION,
+        type=str.upper,
+        choices=sorted(REGION_PRIORS),
+        help="Currency prior for shared symbols like '$' and receipts that name no currency",
+    )
+    p.add_argument(
+        "--formats",
+        type=_formats,
+        default="csv,ndjson,xlsx",
+        help=f"Comma-separated export formats from {', '.join(OUTPUT_FORMATS)}; csv and ndjson are streamed",
+    )
+    p.add_argument("--reporter", default="")
+    p.add_argument("--client", default="")
+    p.add_argument("--purpose", default="")
+    p.add_argument("--visit-type", default="")
+    p.add_argument("--base-currency", default="USD", type=str.upper)
+    p.add_argument("--fx", type=float, default=18.0, help="1 USD equals this many MXN")
+    p.add_argument(
+        "--live-rates",
+        action="store_true",
+        help="Convert currencies other than USD/MXN with fetched FX rates (cached in <out>/fx_rates.json)",
+    )
+    p.add_argument("--logo", default=None)
+    return p
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,27 @@ class ExpenseEntry(BaseModel):
 
     # Non-serialized helpers (private attribute)
     _image_bytes: Optional[bytes] = PrivateAttr(default=None)
+    _image_ref: Optional[str] = PrivateAttr(default=None)  # BlobStore content hash
+
+    @property
+    def has_image(self) -> bool:
+        return bool(self._image_bytes or self._image_ref)
+
+    def attach_image(self, data: bytes, store: Any = None) -> None:
+        """Keep the receipt image inline, or only a reference when a BlobStore is given."""
+        if store is None:
+            self._image_bytes = data
+            self._image_ref = None
+        else:
+            self._image_ref = store.put(data)
+            self._image_bytes = None
+
+    def image_bytes(self, store: Any = None) -> Optional[bytes]:
+        if self._image_bytes is not None:
+            return self._image_bytes
+        if self._image_ref and store is not None:
+            return store.get(self._image_ref)
+        return None
 
     def to_row(self) -> Dict[str, Any]:
         return {
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import typing
+from datetime import date
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+
+
+# Low-cardinality fields stored as dictionary<int32, string>.
+DICTIONARY_FIELDS = {"currency_code", "payment_method", "category"}
+
+# ExpenseEntry field -> column name used by ExpenseEntry.to_row() frames.
+ROW_COLUMNS: Dict[str, str] = {
+    "id": "ID",
+    "merchant_name": "Merchant",
+    "transaction_date": "Date",
+    "transaction_time": "Time",
+    "total_amount": "Total",
+    "currency_code": "Currency",
+    "payment_method": "Payment Method",
+    "category": "Category",
+    "notes": "Notes",
+    "source_name": "Source",
+}
+
+HEADER_METADATA_KEY = b"xpenseit.header"
+
+_SCALAR_TYPES = {str: pa.string(), float: pa.float64(), int: pa.int64(), date: pa.date32()}
+
+
+def _arrow_type(name: str, annotation: Any) -> pa.DataType:
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    base = args[0] if args else annotation
+    if name in DICTIONARY_FIELDS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return _SCALAR_TYPES.get(base, pa.string())
+
+
+def _schema_from_model() -> pa.Schema:
+    return pa.schema(
+        [pa.field(name, _arrow_type(name, info.annotation)) for name, info in ExpenseEntry.model_fields.items()]
+    )
+
+
+EXPENSE_SCHEMA: pa.Schema = _schema_from_model()
+
+
+def _with_header(schema: pa.Schema, header: Optional[ReportHeader]) -> pa.Schema:
+    if header is None:
+        return schema
+    return schema.with_metadata({HEADER_METADATA_KEY: header.model_dump_json().encode("utf-8")})
+
+
+def _array(field: pa.Field, values: List[Any]) -> pa.Array:
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, type=pa.string()).dictionary_encode()
+    return pa.array(values, type=field.type)
+
+
+def entries_table(entries: Iterable[ExpenseEntry], header: Optional[ReportHeader] = None) -> pa.Table:
+    entries = list(entries)
+    arrays = [_array(f, [getattr(e, f.name) for e in entries]) for f in EXPENSE_SCHEMA]
+    return pa.Table.from_arrays(arrays, schema=_with_header(EXPENSE_SCHEMA, header))
+
+
+def frame_table(df: pd.DataFrame, header: Optional[ReportHeader] = None) -> pa.Table:
+    """Typed table from a frame shaped like ``ExpenseEntry.to_row()`` output."""
+    arrays = []
+    for f in EXPENSE_SCHEMA:
+        col = ROW_COLUMNS[f.name]
+        series = df[col] if col in df else pd.Series([None] * len(df), index=df.index)
+        if pa.types.is_floating(f.type):
+            values = [None if pd.isna(v) else v for v in pd.to_numeric(series, errors="coerce").tolist()]
+        elif pa.types.is_date(f.type):
+            values = [None if pd.isna(v) else v.date() for v in pd.to_datetime(series, errors="coerce")]
+        else:
+            values = [None if pd.isna(v) or v == "" else str(v) for v in series.tolist()]
+        arrays.append(_array(f, values))
+    return pa.Table.from_arrays(arrays, schema=_with_header(EXPENSE_SCHEMA, header))
+
+
+def to_parquet_bytes(table: pa.Table, compression: str = "zstd") -> bytes:
+    buf = BytesIO()
+    pq.write_table(table, buf, compression=compression)
+    return buf.getvalue()
+
+
+def to_arrow_ipc_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def header_from_schema(schema: pa.Schema) -> Optional[ReportHeader]:
+    raw = (schema.metadata or {}).get(HEADER_METADATA_KEY)
+    return ReportHeader.model_validate_json(raw) if raw else None
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import Union
+
+
+class BlobStore:
+    """
+    Content-addressed image store on the filesystem.
+
+    Blobs live at ``root/<first 2 hex>/<sha256>``; identical images are written
+    once. ``open`` returns a read-only memory map so readers such as PIL can pull
+    just the bytes they need without materializing the whole file.
+    """
+
+    def __init__(self, root: str = "xpenseit_blobs"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], ref)
+
+    def __contains__(self, ref: str) -> bool:
+        return os.path.exists(self.path(ref))
+
+    def put(self, data: Union[bytes, bytearray, memoryview]) -> str:
+        ref = hashlib.sha256(data).hexdigest()
+        target = self.path(ref)
+        if os.path.exists(target):
+            return ref
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return ref
+
+    def open(self, ref: str) -> mmap.mmap:
+        with open(self.path(ref), "rb") as fh:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get(self, ref: str) -> bytes:
+        with open(self.path(ref), "rb") as fh:
+            return fh.read()
+
+    def size(self, ref: str) -> int:
+        return os.path.getsize(self.path(ref))
@@ -1,28 +1,156 @@
 from __future__ import annotations
 
+import json
+import os
+import threading
+import time
 from dataclasses import dataclass
-from typing import Dict
+from datetime import date
+from typing import Dict, Optional, Sequence, Set, Tuple, Union
+import numpy as np
+import pandas as pd
 import requests
 
 
 EXCHANGE_API = "https://api.exchangerate.host/latest"
 
 
-def fetch_rates(base: str = "USD") -> Dict[str, float]:
+def _fetch_remote(base: str, api_url: str = EXCHANGE_API, timeout: float = 10) -> Dict[str, float]:
+    resp = requests.get(api_url, params={"base": base}, timeout=timeout)
+    resp.raise_for_status()
+    rates = resp.json().get("rates") or {}
+    if not rates:
+        raise ValueError(f"No rates returned for {base}")
+    rates = {str(k).upper(): float(v) for k, v in rates.items()}
+    # Ensure base currency rate 1.0
+    rates[base] = 1.0
+    return rates
+
+
+def _fallback_rates(base: str) -> Dict[str, float]:
+    # Fallback simple mapping if offline
+    if base == "USD":
+        return {"USD": 1.0, "MXN": 18.0}
+    if base == "MXN":
+        return {"USD": 1.0 / 18.0, "MXN": 1.0}
+    return {base: 1.0}
+
+
+def fetch_rates(base: str = "USD", cache: Optional["RateCache"] = None) -> Dict[str, float]:
+    if cache is not None:
+        return cache.get(base)
     try:
-        resp = requests.get(EXCHANGE_API, params={"base": base}, timeout=10)
-        data = resp.json()
-        rates = data.get("rates", {})
-        # Ensure base currency rate 1.0
-        rates[base] = 1.0
-        return rates
+        return _fetch_remote(base)
     except Exception:
-        # Fallback simple mapping if offline
-        if base == "USD":
-            return {"USD": 1.0, "MXN": 18.0}
-        if base == "MXN":
-            return {"USD": 1.0 / 18.0, "MXN": 1.0}
-        return {base: 1.0}
+        return _fallback_rates(base)
+
+
+class RateCache:
+    """
+    FX rates memoized in process and persisted to a JSON file, keyed by base + date.
+
+    Fresh entries (younger than ``ttl`` seconds) are returned directly. Stale or
+    previous-day entries are returned immediately while a background thread refreshes
+    them. With nothing cached, ``get`` fetches synchronously unless ``block=False``,
+    in which case the offline fallback is returned and a refresh is scheduled.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = "fx_rates.json",
+        ttl: float = 6 * 3600,
+        api_url: str = EXCHANGE_API,
+        timeout: float = 10,
+        keep_days: int = 7,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.api_url = api_url
+        self.timeout = timeout
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        self._inflight: Set[str] = set()
+        self._entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._entries, fh)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _key(base: str, day: date) -> str:
+        return f"{base}:{day.isoformat()}"
+
+    def _latest(self, base: str) -> Optional[Dict]:
+        candidates = [v for k, v in self._entries.items() if k.split(":", 1)[0] == base]
+        return max(candidates, key=lambda v: v["fetched_at"]) if candidates else None
+
+    def _store(self, base: str, rates: Dict[str, float]) -> None:
+        today = date.today()
+        with self._lock:
+            self._entries[self._key(base, today)] = {"fetched_at": time.time(), "rates": rates}
+            cutoff = today.toordinal() - self.keep_days
+            for key in list(self._entries):
+                if date.fromisoformat(key.split(":", 1)[1]).toordinal() < cutoff:
+                    del self._entries[key]
+            try:
+                self._save()
+            except Exception:
+                pass
+
+    def refresh(self, base: str = "USD") -> Dict[str, float]:
+        rates = _fetch_remote(base, self.api_url, self.timeout)
+        self._store(base, rates)
+        return rates
+
+    def _refresh_in_background(self, base: str) -> None:
+        with self._lock:
+            if base in self._inflight:
+                return
+            self._inflight.add(base)
+
+        def run():
+            try:
+                self.refresh(base)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._inflight.discard(base)
+
+        threading.Thread(target=run, name=f"fx-refresh-{base}", daemon=True).start()
+
+    def get(self, base: str = "USD", block: bool = True) -> Dict[str, float]:
+        base = base.upper()
+        with self._lock:
+            entry = self._entries.get(self._key(base, date.today()))
+            current = entry is not None
+            if entry is None:
+                entry = self._latest(base)
+        if entry is not None:
+            if not current or time.time() - entry["fetched_at"] >= self.ttl:
+                self._refresh_in_background(base)
+            return dict(entry["rates"])
+        if block:
+            try:
+                return dict(self.refresh(base))
+            except Exception:
+                return _fallback_rates(base)
+        self._refresh_in_background(base)
+        return _fallback_rates(base)
 
 
 def convert(amount: float, from_ccy: str, to_ccy: str, rates: Dict[str, float]) -> float:
@@ -37,3 +165,38 @@ def convert(amount: float, from_ccy: str, to_ccy: str, rates: Dict[str, float])
     return base_amount * rates[to_ccy]
 
 
+def convert_many(
+    amounts: Sequence[float],
+    from_codes: Sequence[str],
+    to_code: str,
+    rates: Dict[str, float],
+    return_mask: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Vectorized :func:`convert` over whole columns.
+
+    Currency codes are factorized once, so each distinct code is upper-cased and
+    looked up a single time; conversion is then one multiply over the array. As
+    with ``convert``, amounts in codes missing from ``rates`` pass through
+    unchanged; ``return_mask`` also returns the boolean mask of converted rows.
+    """
+    values = np.asarray(amounts, dtype=float)
+    codes = np.asarray(from_codes, dtype=object)
+    to_code = to_code.upper()
+    if to_code not in rates:
+        out, known = values.copy(), np.zeros(values.shape, dtype=bool)
+        return (out, known) if return_mask else out
+
+    # Hash-based factorize is O(n); missing codes get -1, which indexes the trailing NaN.
+    inverse, uniq = pd.factorize(codes.ravel())
+    factors = np.full(len(uniq) + 1, np.nan)
+    for i, code in enumerate(uniq):
+        code = str(code).upper()
+        if code == to_code:
+            factors[i] = 1.0
+        elif code in rates:
+            factors[i] = rates[to_code] / rates[code]
+    row_factors = factors[inverse.reshape(codes.shape)]
+    known = ~np.isnan(row_factors)
+    out = np.where(known, values * np.where(known, row_factors, 1.0), values)
+    return (out, known) if return_mask else out
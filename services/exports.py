@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import datetime as _dt
+import pandas as pd
+
+from xpenseit.models import ReportHeader
+from xpenseit.services.totals import ReportTotals, totals_for_frame
+
+
+EXPORT_FORMATS: Tuple[str, ...] = ("csv", "json", "xlsx")
+XLSX_ENGINES: Tuple[str, ...] = ("openpyxl", "xlsxwriter", "openpyxl-write-only")
+
+# Module-level so export bytes survive Streamlit reruns.
+_EXPORT_CACHE_SIZE = 32
+_EXPORT_CACHE: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_EXPORT_LOCK = threading.Lock()
+
+
+def _export_key(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> str:
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(header.model_dump_json().encode("utf-8"))
+    if totals is not None:
+        h.update(repr(totals.rows()).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _build_csv(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _build_json(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> bytes:
+    return df.to_json(orient="records", indent=2).encode("utf-8")
+
+
+def _build_xlsx(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> bytes:
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        # Summary sheet with totals similar to PDF
+        summary_rows = [
+            ["Reporter", header.reporter_name],
+            ["Date", header.report_date.isoformat()],
+            ["Trip Purpose", header.trip_purpose],
+            ["Client", header.client],
+            ["Visit Type", header.visit_type],
+            ["Base Currency", header.base_currency],
+            ["FX (1 USD)", f"{header.fx_usd_to_mxn:.4f} MXN"],
+        ]
+        summary = pd.DataFrame(summary_rows, columns=["Field", "Value"])
+        summary.to_excel(writer, index=False, sheet_name="Summary")
+
+        # Expenses sheet
+        df.to_excel(writer, index=False, sheet_name="Expenses")
+
+        # Totals sheet
+        if totals is None:
+            totals = totals_for_frame(df, header)
+        totals_df = pd.DataFrame(totals.rows(), columns=["Metric", "Value"])
+        totals_df.to_excel(writer, index=False, sheet_name="Totals")
+    return output.getvalue()
+
+
+def _summary_rows(header: ReportHeader) -> List[List[Any]]:
+    return [
+        ["Reporter", header.reporter_name],
+        ["Date", header.report_date],
+        ["Trip Purpose", header.trip_purpose],
+        ["Client", header.client],
+        ["Visit Type", header.visit_type],
+        ["Base Currency", header.base_currency],
+        ["FX (1 USD in MXN)", header.fx_usd_to_mxn],
+    ]
+
+
+def _typed_expense_rows(df: pd.DataFrame) -> Iterator[List[Any]]:
+    """Expense rows with real numeric/date values and None for blanks."""
+    columns = []
+    for name in df.columns:
+        if name == "Total":
+            values = pd.to_numeric(df[name], errors="coerce").tolist()
+            columns.append([None if math.isnan(v) else v for v in values])
+        elif name == "Date":
+            values = pd.to_datetime(df[name], errors="coerce")
+            columns.append([None if pd.isna(v) else v.date() for v in values])
+        else:
+            columns.append([None if pd.isna(v) or v == "" else v for v in df[name].tolist()])
+    for row in zip(*columns):
+        yield list(row)
+
+
+def _typed_totals_rows(totals: ReportTotals) -> List[List[Any]]:
+    rows: List[List[Any]] = [[f"Subtotal {c}", v, c] for c, v in totals.subtotals.items()]
+    rows += [[f"Total {c}", v, c] for c, v in totals.totals.items()]
+    if totals.unconverted:
+        rows.append(["Not converted", None, ", ".join(totals.unconverted)])
+    return rows
+
+
+def _build_xlsx_streaming(
+    df: pd.DataFrame,
+    header: ReportHeader,
+    totals: ReportTotals | None,
+    engine: str = "xlsxwriter",
+) -> bytes:
+    """
+    Write the Summary/Expenses/Totals workbook row by row with typed cells.
+
+    ``xlsxwriter`` runs in constant_memory mode (rows are flushed to a temp file
+    as written); ``openpyxl-write-only`` uses openpyxl's streaming worksheet.
+    """
+    if totals is None:
+        totals = totals_for_frame(df, header)
+    money = "#,##0.00"
+    amount_col = {list(df.columns).index("Total"): money} if "Total" in df else {}
+    # (sheet, header row, rows, number format per numeric column); the only
+    # number on Summary is the FX rate, shown to 4 places like the PDF.
+    sheets = [
+        ("Summary", ["Field", "Value"], _summary_rows(header), {1: "0.0000"}),
+        ("Expenses", list(df.columns), _typed_expense_rows(df), amount_col),
+        ("Totals", ["Metric", "Amount", "Currency"], _typed_totals_rows(totals), {1: money}),
+    ]
+    output = io.BytesIO()
+    if engine == "xlsxwriter":
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+        date_fmt = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        for name, head, rows, number_formats in sheets:
+            ws = workbook.add_worksheet(name)
+            col_fmts = {c: workbook.add_format({"num_format": f}) for c, f in number_formats.items()}
+            ws.write_row(0, 0, head)
+            for r, row in enumerate(rows, start=1):
+                for c, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, _dt.date):
+                        ws.write_datetime(r, c, _dt.datetime.combine(value, _dt.time()), date_fmt)
+                    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                        ws.write_number(r, c, value, col_fmts.get(c))
+                    else:
+                        ws.write(r, c, value)
+        workbook.close()
+    elif engine == "openpyxl-write-only":
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+
+        workbook = Workbook(write_only=True)
+        for name, head, rows, number_formats in sheets:
+            ws = workbook.create_sheet(name)
+            ws.append(head)
+            for row in rows:
+                if number_formats:
+                    row = list(row)
+                    for c, fmt in number_formats.items():
+                        if isinstance(row[c], (int, float)) and not isinstance(row[c], bool):
+                            cell = WriteOnlyCell(ws, value=row[c])
+                            cell.number_format = fmt
+                            row[c] = cell
+                ws.append(row)
+        workbook.save(output)
+    else:
+        raise ValueError(f"Unknown streaming xlsx engine: {engine}")
+    return output.getvalue()
+
+
+def _build_parquet(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> bytes:
+    # pyarrow is only needed when a typed export is actually requested.
+    from xpenseit.services.arrow_export import frame_table, to_parquet_bytes
+
+    return to_parquet_bytes(frame_table(df, header))
+
+
+def _build_arrow(df: pd.DataFrame, header: ReportHeader, totals: ReportTotals | None) -> bytes:
+    from xpenseit.services.arrow_export import frame_table, to_arrow_ipc_bytes
+
+    return to_arrow_ipc_bytes(frame_table(df, header))
+
+
+_EXPORT_BUILDERS: Dict[str, Callable[[pd.DataFrame, ReportHeader, Optional[ReportTotals]], bytes]] = {
+    "csv": _build_csv,
+    "json": _build_json,
+    "xlsx": _build_xlsx,
+    "parquet": _build_parquet,
+    "arrow": _build_arrow,
+}
+
+
+def get_download_bytes(
+    df: pd.DataFrame,
+    header: ReportHeader,
+    totals: ReportTotals | None = None,
+    formats: Iterable[str] | None = None,
+    xlsx_engine: str = "openpyxl",
+    rates: Dict[str, float] | None = None,
+) -> Dict[str, bytes]:
+    """
+    Build export files for ``formats`` (default: all of EXPORT_FORMATS; "parquet"
+    and "arrow" typed exports are available on request).
+
+    Output is memoized on a content hash of the frame and header, so reruns with
+    unchanged data return the cached bytes and only missing formats are built.
+    ``xlsx_engine`` picks the Excel writer: "openpyxl" (pandas ExcelWriter) or one
+    of the streaming, typed-cell writers "xlsxwriter" / "openpyxl-write-only".
+    Without precomputed ``totals``, ``rates`` (units per 1 USD) extends the
+    header's USD/MXN rate for the totals.
+    """
+    if xlsx_engine not in XLSX_ENGINES:
+        raise ValueError(f"Unknown xlsx engine: {xlsx_engine}")
+    if totals is None and rates:
+        totals = totals_for_frame(df, header, rates=rates)
+    key = _export_key(df, header, totals)
+    out: Dict[str, bytes] = {}
+    for fmt in (EXPORT_FORMATS if formats is None else formats):
+        builder = _EXPORT_BUILDERS.get(fmt)
+        if builder is None:
+            raise ValueError(f"Unknown export format: {fmt}")
+        variant = fmt
+        if fmt == "xlsx" and xlsx_engine != "openpyxl":
+            builder = partial(_build_xlsx_streaming, engine=xlsx_engine)
+            variant = f"xlsx:{xlsx_engine}"
+        with _EXPORT_LOCK:
+            cached = _EXPORT_CACHE.get((key, variant))
+            if cached is not None:
+                _EXPORT_CACHE.move_to_end((key, variant))
+                out[fmt] = cached
+                continue
+        data = builder(df, header, totals)
+        with _EXPORT_LOCK:
+            _EXPORT_CACHE[(key, variant)] = data
+            while len(_EXPORT_CACHE) > _EXPORT_CACHE_SIZE:
+                _EXPORT_CACHE.popitem(last=False)
+        out[fmt] = data
+    return out
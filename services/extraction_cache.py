@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+
+@lru_cache(maxsize=8)
+def _text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def image_digest(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def make_key(image_bytes: bytes, model: str, prompt: str, region: str = "") -> str:
+    """
+    Content address for an extraction: image bytes + model + prompt, plus the
+    currency region, since cached fields are stored after normalization.
+    """
+    key = f"{image_digest(image_bytes)}:{model}:{_text_digest(prompt)}"
+    return f"{key}:{region}" if region else key
+
+
+def _encode(fields: Dict[str, Any]) -> str:
+    out = dict(fields)
+    if isinstance(out.get("transaction_date"), date):
+        out["transaction_date"] = out["transaction_date"].isoformat()
+    return json.dumps(out)
+
+
+def _decode(payload: str) -> Dict[str, Any]:
+    data = json.loads(payload)
+    if data.get("transaction_date"):
+        try:
+            data["transaction_date"] = date.fromisoformat(data["transaction_date"])
+        except Exception:
+            data["transaction_date"] = None
+    return data
+
+
+class ExtractionCache:
+    """
+    Persistent SQLite cache of normalized extraction results.
+
+    Entries are evicted least-recently-used once ``max_entries`` is exceeded.
+    ``source_name`` and ``error`` are never stored; callers re-attach the file name.
+    """
+
+    def __init__(self, path: str = "xpenseit_cache.sqlite3", max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS extractions_lru ON extractions(last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return _decode(row[0])
+
+    def put(self, key: str, fields: Dict[str, Any]) -> None:
+        stored = {k: v for k, v in fields.items() if k not in ("source_name", "error")}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, payload, last_used) VALUES (?, ?, ?)",
+                (key, _encode(stored), time.time()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM extractions WHERE key IN ("
+                    " SELECT key FROM extractions ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM extractions").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict
+
+from PIL import Image as PILImage, ImageOps, ImageStat
+
+
+# Mean HSV saturation (0-255) under which a receipt is treated as grayscale.
+GRAYSCALE_SATURATION = 18.0
+
+_MIME = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime: str
+    width: int
+    height: int
+    original_size: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - len(self.data)
+
+
+class _PrepStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        with self._lock:
+            self.images += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "images": self.images,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "seconds": self.seconds,
+            }
+
+
+_STATS = _PrepStats()
+
+
+def prep_stats() -> Dict[str, float]:
+    """Cumulative preprocessing metrics for this process."""
+    return _STATS.snapshot()
+
+
+def reset_prep_stats() -> None:
+    _STATS.reset()
+
+
+def _looks_grayscale(pil: PILImage.Image) -> bool:
+    small = pil.copy()
+    small.thumbnail((64, 64))
+    saturation = small.convert("HSV").split()[1]
+    return ImageStat.Stat(saturation).mean[0] < GRAYSCALE_SATURATION
+
+
+def prepare_image(
+    image_bytes: bytes,
+    max_edge: int = 1600,
+    fmt: str = "JPEG",
+    quality: int = 80,
+    grayscale: str = "auto",
+) -> PreparedImage:
+    """
+    Decodes, EXIF-orients, optionally grays and downsizes an image, then re-encodes it.
+
+    ``grayscale`` is "auto" (only when the image is nearly colorless), "always" or "never".
+    Falls back to the original bytes when decoding fails or re-encoding would not help.
+    """
+    started = time.perf_counter()
+    fmt = fmt.upper()
+    try:
+        pil = PILImage.open(BytesIO(image_bytes))
+        pil.load()
+    except Exception:
+        _STATS.record(len(image_bytes), len(image_bytes), time.perf_counter() - started)
+        return PreparedImage(image_bytes, "image/png", 0, 0, len(image_bytes))
+
+    source_mime = PILImage.MIME.get(pil.format or "", "image/png")
+    reshaped = pil.getexif().get(0x0112, 1) != 1  # EXIF Orientation
+    if reshaped:
+        pil = ImageOps.exif_transpose(pil)
+    if pil.mode in ("RGBA", "LA") or (pil.mode == "P" and "transparency" in pil.info):
+        pil = pil.convert("RGBA")
+        bg = PILImage.new("RGB", pil.size, (255, 255, 255))
+        bg.paste(pil, mask=pil.split()[-1])
+        pil = bg
+    elif pil.mode not in ("RGB", "L"):
+        pil = pil.convert("RGB")
+
+    if grayscale == "always" or (grayscale == "auto" and pil.mode == "RGB" and _looks_grayscale(pil)):
+        pil = pil.convert("L")
+
+    if max_edge and max(pil.size) > max_edge:
+        pil.thumbnail((max_edge, max_edge), PILImage.LANCZOS)
+        reshaped = True
+
+    out = BytesIO()
+    pil.save(out, format=fmt, quality=quality, optimize=True)
+    data = out.getvalue()
+    width, height = pil.size
+    if len(data) >= len(image_bytes) and not reshaped:
+        # Nothing to gain; keep the original payload with its real MIME type.
+        prepared = PreparedImage(image_bytes, source_mime, width, height, len(image_bytes))
+    else:
+        prepared = PreparedImage(data, _MIME.get(fmt, "image/jpeg"), width, height, len(image_bytes))
+    _STATS.record(len(image_bytes), len(prepared.data), time.perf_counter() - started)
+    return prepared
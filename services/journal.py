@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from xpenseit.services.extraction_cache import _decode, _encode
+
+
+def file_key(path: str, name: Optional[str] = None) -> str:
+    """Cheap identity for an input file: name + size + mtime, no content read."""
+    st = os.stat(path)
+    return f"{name or path}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class IngestJournal:
+    """
+    Append-only SQLite (WAL) journal of ingestion progress.
+
+    Every extracted item (image or PDF page) is appended with its status, image
+    hash and normalized fields; a file is closed with a ``done`` record once all
+    of its items were attempted. On restart, files whose latest run finished with
+    no failed items are replayed from the journal without reading or rendering
+    them again, so restart cost tracks the remaining work.
+    """
+
+    def __init__(self, path: str = "xpenseit_journal.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " file_key TEXT NOT NULL,"
+            " item INTEGER NOT NULL,"
+            " file_name TEXT,"
+            " image_hash TEXT,"
+            " status TEXT NOT NULL,"
+            " fields TEXT,"
+            " error TEXT,"
+            " ts REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " file_key TEXT NOT NULL,"
+            " items INTEGER NOT NULL,"
+            " ts REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_file ON items(file_key, item, seq)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_key ON files(file_key, seq)")
+        self._conn.commit()
+
+    def record_item(
+        self,
+        key: str,
+        item: int,
+        file_name: str,
+        image_hash: Optional[str],
+        fields: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        status = "error" if error else "ok"
+        payload = _encode({k: v for k, v in (fields or {}).items() if k != "error"}) if fields else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO items (file_key, item, file_name, image_hash, status, fields, error, ts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, item, file_name, image_hash, status, payload, error, time.time()),
+            )
+            self._conn.commit()
+
+    def mark_file_done(self, key: str, items: int) -> None:
+        with self._lock:
+            self._conn.execute("INSERT INTO files (file_key, items, ts) VALUES (?, ?, ?)", (key, items, time.time()))
+            self._conn.commit()
+
+    def completed_items(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Latest fields per item for a file that finished with every item ok, in item
+        order, each with an ``image_hash`` key; None if the file must be (re)processed.
+        """
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT items FROM files WHERE file_key = ? ORDER BY seq DESC LIMIT 1", (key,)
+            ).fetchone()
+            if done is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT item, image_hash, status, fields FROM items"
+                " WHERE seq IN (SELECT MAX(seq) FROM items WHERE file_key = ? GROUP BY item)"
+                " ORDER BY item",
+                (key,),
+            ).fetchall()
+        if len(rows) != done[0] or any(status != "ok" for _, _, status, _ in rows):
+            return None
+        out = []
+        for _, image_hash, _, payload in rows:
+            fields = _decode(payload) if payload else {}
+            fields["image_hash"] = image_hash
+            out.append(fields)
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (files,) = self._conn.execute("SELECT COUNT(DISTINCT file_key) FROM files").fetchone()
+            (failed,) = self._conn.execute(
+                "SELECT COUNT(*) FROM items"
+                " WHERE seq IN (SELECT MAX(seq) FROM items GROUP BY file_key, item) AND status = 'error'"
+            ).fetchone()
+        return {"files_done": files, "items_failed": failed}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import re
+from calendar import monthrange
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Month names/abbreviations in English and Spanish, lower-case, without dots.
+MONTHS = {
+    "jan": 1, "january": 1, "ene": 1, "enero": 1,
+    "feb": 2, "february": 2, "febrero": 2,
+    "mar": 3, "march": 3, "marzo": 3,
+    "apr": 4, "april": 4, "abr": 4, "abril": 4,
+    "may": 5, "mayo": 5,
+    "jun": 6, "june": 6, "junio": 6,
+    "jul": 7, "july": 7, "julio": 7,
+    "aug": 8, "august": 8, "ago": 8, "agosto": 8,
+    "sep": 9, "sept": 9, "september": 9, "septiembre": 9, "set": 9,
+    "oct": 10, "october": 10, "octubre": 10,
+    "nov": 11, "november": 11, "noviembre": 11,
+    "dec": 12, "december": 12, "dic": 12, "diciembre": 12,
+}
+
+_ISO_DATE_RE = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?:[T\s].*)?$")
+_NUMERIC_DATE_RE = re.compile(r"^\s*(\d{1,2})[-/.](\d{1,2})[-/.](\d{2}|\d{4})\s*$")
+_DAY_MONTH_RE = re.compile(r"^\s*(\d{1,2})(?:\s+de)?[\s\-/]+([A-Za-z]+)\.?(?:\s+de)?[\s,\-/]+(\d{4})\s*$", re.IGNORECASE)
+_MONTH_DAY_RE = re.compile(r"^\s*([A-Za-z]+)\.?\s+(\d{1,2}),?\s+(\d{4})\s*$")
+
+_TIME_RE = re.compile(r"^\s*(\d{1,2})[:.h](\d{2})(?::\d{2})?\s*(?:([AaPp])\.?\s*[Mm]\.?)?")
+# Fast path: already-canonical 24h "HH:MM" with optional ":SS".
+_HHMM_RE = re.compile(r"(?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d)?")
+
+_NUMBER_RE = re.compile(r"\d[\d.,'\s]*\d|\d")
+_NEGATIVE_RE = re.compile(r"^\s*(?:-|\(|[A-Za-z$€£¥₹]+\s*-)")
+_GROUPING = str.maketrans("", "", "'\u00a0\u202f ")
+# Currency prefixes the amount fast path strips ("MX$", "USD ", "US$").
+_AMOUNT_PREFIX = "ABCDEFGHIJKLMNOPQRSTUVWXYZ$ "
+
+
+def _valid_date(year: int, month: int, day: int) -> Optional[date]:
+    if 1 <= month <= 12 and 1 <= year <= 9999 and 1 <= day <= monthrange(year, month)[1]:
+        return date(year, month, day)
+    return None
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """
+    Parse ISO, day-first numeric (month-first when day-first is impossible) and
+    English/Spanish month-name dates. Returns None instead of raising.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    s = str(value)
+    m = _ISO_DATE_RE.match(s)
+    if m:
+        return _valid_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = _NUMERIC_DATE_RE.match(s)
+    if m:
+        a, b, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if year < 100:
+            year += 2000
+        return _valid_date(year, b, a) or _valid_date(year, a, b)
+    m = _DAY_MONTH_RE.match(s)
+    if m:
+        month = MONTHS.get(m.group(2).lower())
+        return _valid_date(int(m.group(3)), month, int(m.group(1))) if month else None
+    m = _MONTH_DAY_RE.match(s)
+    if m:
+        month = MONTHS.get(m.group(1).lower())
+        return _valid_date(int(m.group(3)), month, int(m.group(2))) if month else None
+    return None
+
+
+def parse_time(value: Any) -> Optional[str]:
+    """Parse "14:05", "2:05 pm", "14.05", "14h05" (trailing text ignored) to 24h HH:MM."""
+    if not value:
+        return None
+    s = str(value)
+    if _HHMM_RE.fullmatch(s):
+        return s[:5]
+    m = _TIME_RE.match(s)
+    if not m:
+        return None
+    hh, mm = int(m.group(1)), int(m.group(2))
+    meridiem = (m.group(3) or "").lower()
+    if meridiem:
+        if not 1 <= hh <= 12:
+            return None
+        hh = hh % 12 + (12 if meridiem == "p" else 0)
+    if hh > 23 or mm > 59:
+        return None
+    return f"{hh:02d}:{mm:02d}"
+
+
+def _is_grouping(num: str, sep: int) -> bool:
+    return len(num) - sep - 1 == 3 and num[:sep] != "0"
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Parse amounts with currency symbols/codes and either decimal convention:
+    "MX$1,234.56", "1.234,56 €", "1 234,56", "(12.00)", "USD 7".
+    The last of '.'/',' is the decimal mark when both appear; a lone separator of
+    either kind followed by exactly three digits is thousands grouping ("1.234",
+    "1,234"), unless the whole part is 0 ("0.125").
+    """
+    if type(value) is str:
+        # Fast path for "1,234.56", "1.234,56", "$12.00", "MX$ 99,90": a separator before
+        # the last two digits is always the decimal mark, so dropping the other one gives
+        # the same value as the general rules. Anything float() rejects falls through.
+        mark = value[-3:-2]
+        if mark == "." or mark == ",":
+            body = value.lstrip(_AMOUNT_PREFIX)
+            body = body.replace(",", "") if mark == "." else body.replace(".", "").replace(",", ".")
+            if body[:1].isdecimal() and "_" not in body:
+                try:
+                    return float(body)
+                except ValueError:
+                    pass
+    elif value is None or isinstance(value, bool):
+        return None
+    elif isinstance(value, (int, float)):
+        return float(value)
+    s = str(value)
+    m = _NUMBER_RE.search(s)
+    if not m:
+        return None
+    num = m.group(0).translate(_GROUPING)
+    last_dot, last_comma = num.rfind("."), num.rfind(",")
+    if last_dot != -1 and last_comma != -1:
+        decimal = "." if last_dot > last_comma else ","
+    elif last_comma != -1:
+        decimal = "," if num.count(",") == 1 and not _is_grouping(num, last_comma) else ""
+    elif last_dot != -1:
+        decimal = "." if num.count(".") == 1 and not _is_grouping(num, last_dot) else ""
+    else:
+        decimal = ""
+    if decimal:
+        whole, _, frac = num.rpartition(decimal)
+        num = whole.replace(".", "").replace(",", "") + "." + frac
+    else:
+        num = num.replace(".", "").replace(",", "")
+    amount = float(num)
+    return -amount if _NEGATIVE_RE.match(s) else amount
+
+
+# ISO 4217 codes accepted as-is from Vision replies and receipt text.
+ISO_CURRENCIES = frozenset(
+    "USD MXN CAD EUR GBP JPY CNY INR BRL ARS CLP COP PEN AUD NZD CHF SEK NOK DKK PLN CZK HUF "
+    "HKD SGD TWD KRW THB VND PHP IDR MYR ILS TRY RUB ZAR AED SAR GTQ CRC DOP UYU".split()
+)
+
+# Symbols and spellings that name exactly one currency. Keys are upper-case.
+CURRENCY_SYMBOLS: Dict[str, str] = {
+    "MX$": "MXN", "MEX$": "MXN", "M.N.": "MXN", "MN": "MXN", "PESO": "MXN", "PESOS": "MXN",
+    "US$": "USD", "U$S": "USD", "USD$": "USD", "DLLS": "USD", "DLS": "USD", "DOLARES": "USD", "DÓLARES": "USD",
+    "DOLLAR": "USD", "DOLLARS": "USD",
+    "C$": "CAD", "CA$": "CAD", "CAN$": "CAD",
+    "A$": "AUD", "AU$": "AUD", "NZ$": "NZD", "R$": "BRL", "HK$": "HKD", "S$": "SGD", "NT$": "TWD",
+    "€": "EUR", "EUROS": "EUR", "£": "GBP", "₹": "INR", "₩": "KRW", "₽": "RUB", "₺": "TRY",
+    "₪": "ILS", "₱": "PHP", "₫": "VND", "฿": "THB", "ZŁ": "PLN", "S/": "PEN", "元": "CNY",
+}
+
+# Symbols shared by several currencies, resolved by country hints, then the region prior.
+AMBIGUOUS_SYMBOLS: Dict[str, Tuple[str, ...]] = {
+    "$": ("USD", "MXN", "CAD", "AUD", "NZD", "ARS", "CLP", "COP"),
+    "¥": ("JPY", "CNY"),
+    "KR": ("SEK", "NOK", "DKK"),
+}
+
+# Lower-case words in merchant/receipt text that place it in a country.
+COUNTRY_HINTS: Dict[str, str] = {
+    "mexico": "MXN", "méxico": "MXN", "cdmx": "MXN", "s.a. de c.v.": "MXN", "sa de cv": "MXN",
+    "r.f.c.": "MXN", "rfc": "MXN", "oxxo": "MXN", "pemex": "MXN", "guadalajara": "MXN",
+    "monterrey": "MXN", "cancun": "MXN", "cancún": "MXN",
+    "canada": "CAD", "ontario": "CAD", "toronto": "CAD", "vancouver": "CAD", "montreal": "CAD", "gst/hst": "CAD",
+    "usa": "USD", "united states": "USD",
+    "brasil": "BRL", "brazil": "BRL", "cnpj": "BRL",
+    "australia": "AUD", "sydney": "AUD", "melbourne": "AUD",
+    "united kingdom": "GBP", "london": "GBP",
+    "españa": "EUR", "madrid": "EUR", "barcelona": "EUR", "paris": "EUR", "berlin": "EUR", "deutschland": "EUR",
+    "japan": "JPY", "tokyo": "JPY", "china": "CNY", "beijing": "CNY", "shanghai": "CNY",
+    "sverige": "SEK", "norge": "NOK", "danmark": "DKK",
+}
+
+# Per-region choice for each ambiguous symbol; "" is the currency assumed when a
+# receipt gives no evidence at all. Add entries to support more regions.
+REGION_PRIORS: Dict[str, Dict[str, str]] = {
+    "US": {"": "USD", "$": "USD", "¥": "JPY", "KR": "SEK"},
+    "MX": {"": "MXN", "$": "MXN"},
+    "CA": {"": "CAD", "$": "CAD"},
+    "EU": {"": "EUR", "KR": "DKK"},
+    "UK": {"": "GBP"},
+    "BR": {"": "BRL"},
+    "AU": {"": "AUD", "$": "AUD"},
+    "JP": {"": "JPY", "¥": "JPY"},
+    "CN": {"": "CNY", "¥": "CNY"},
+}
+DEFAULT_REGION = "US"
+_region = DEFAULT_REGION
+
+# Flat upper-case token -> code (or candidate tuple) table for O(1) lookups.
+_CURRENCY_TOKENS: Dict[str, Any] = {
+    **{code: code for code in ISO_CURRENCIES},
+    **CURRENCY_SYMBOLS,
+    **AMBIGUOUS_SYMBOLS,
+}
+# Letter-only spellings are left to exact lookups; in free text they collide with ordinary words.
+_SCAN_SYMBOLS = [
+    sym
+    for sym in sorted(list(CURRENCY_SYMBOLS) + list(AMBIGUOUS_SYMBOLS), key=len, reverse=True)
+    if not sym.isalpha() or not sym.isascii()
+]
+
+
+def _alternation(symbols: List[str]) -> str:
+    return "|".join(re.escape(sym) for sym in symbols)
+
+
+# Symbols spelled with letters ("S/", "R$", "M.N.") only count next to a number,
+# so "Taxes/Fees" or "Items/Qty" do not read as soles. The lookarounds are
+# factored out of the alternation, so each text position is tested once rather
+# than once per symbol. Letter and non-letter symbols never share a first
+# character, and each list stays longest-first ("MX$" before "$").
+_LETTER_SYMBOLS = _alternation([sym for sym in _SCAN_SYMBOLS if any("A" <= ch <= "Z" for ch in sym)])
+_CURRENCY_RE = re.compile(
+    rf"(?<![A-Za-z])(?:(?<=\d)(?:{_LETTER_SYMBOLS})(?![A-Za-z])|(?<=\d )(?:{_LETTER_SYMBOLS})(?![A-Za-z])"
+    rf"|(?:{_LETTER_SYMBOLS})(?= ?\d))"
+    rf"|{_alternation([sym for sym in _SCAN_SYMBOLS if not any('A' <= ch <= 'Z' for ch in sym)])}"
+    r"|\b(?:" + "|".join(sorted(ISO_CURRENCIES)) + r")\b"
+)
+_HINT_RE = re.compile(
+    r"(?<!\w)(?:" + "|".join(re.escape(h) for h in sorted(COUNTRY_HINTS, key=len, reverse=True)) + r")(?!\w)",
+    re.IGNORECASE,
+)
+
+
+def set_region(region: str) -> None:
+    """Select the REGION_PRIORS entry used when a call passes no ``region``."""
+    global _region
+    region = region.upper()
+    if region not in REGION_PRIORS:
+        raise ValueError(f"Unknown region {region!r}; expected one of {', '.join(sorted(REGION_PRIORS))}")
+    _region = region
+
+
+def current_region() -> str:
+    """Region used when a call passes no ``region``."""
+    return _region
+
+
+def _prior(region: Optional[str]) -> Dict[str, str]:
+    return REGION_PRIORS.get((region or _region).upper()) or REGION_PRIORS[DEFAULT_REGION]
+
+
+def _hint(text: Optional[str]) -> Optional[str]:
+    m = _HINT_RE.search(text) if text else None
+    return COUNTRY_HINTS[m.group(0).lower()] if m else None
+
+
+def _resolve(symbol: str, candidates: Tuple[str, ...], text: Optional[str], region: Optional[str]) -> str:
+    hinted = _hint(text)
+    if hinted in candidates:
+        return hinted
+    prior = _prior(region)
+    choice = prior.get(symbol) or prior[""]
+    return choice if choice in candidates else candidates[0]
+
+
+def find_currency(text: Optional[str], region: Optional[str] = None) -> Optional[str]:
+    """
+    Currency named by free text: the first unambiguous code or symbol, else an
+    ambiguous symbol resolved by country hints and region, else a country hint.
+    None when the text gives no evidence.
+    """
+    if not text:
+        return None
+    ambiguous = None
+    for m in _CURRENCY_RE.finditer(text):
+        token = m.group(0).upper()
+        found = _CURRENCY_TOKENS[token]
+        if isinstance(found, str):
+            return found
+        ambiguous = ambiguous or (token, found)
+    if ambiguous:
+        return _resolve(ambiguous[0], ambiguous[1], text, region)
+    return _hint(text)
+
+
+def infer_currency(value: Any, text: Optional[str] = None, region: Optional[str] = None) -> str:
+    """
+    Normalize a reported currency ("$", "MX$", "usd", "M.N.") to an ISO code.
+    ``text`` (merchant name or receipt text) breaks ties for shared symbols and
+    fills in a missing value; the region prior decides when nothing else does.
+    """
+    if value:
+        token = str(value).strip().upper()
+        found = _CURRENCY_TOKENS.get(token)
+        if isinstance(found, str):
+            return found
+        if found:
+            return _resolve(token, found, text, region)
+        found = next((_CURRENCY_TOKENS[w] for w in token.split() if isinstance(_CURRENCY_TOKENS.get(w), str)), None)
+        found = found or find_currency(token, region)
+        if found:
+            return found
+        if len(token) == 3 and token.isalpha():
+            return token
+    return find_currency(text, region) or _prior(region)[""]
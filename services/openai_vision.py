@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import concurrent.futures
 import json
-from datetime import datetime
-from typing import Any, Dict, Optional
+import threading
+import time
+import weakref
+from datetime import date
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, ValidationError, ValidationInfo, field_validator
+
+from xpenseit.models import DEFAULT_CATEGORIES, DEFAULT_PAYMENT_METHODS, ExpenseEntry
+
+from xpenseit.services.extraction_cache import ExtractionCache, make_key
+from xpenseit.services.image_prep import prepare_image
+from xpenseit.services.normalize import current_region, infer_currency, parse_amount, parse_date, parse_time
+from xpenseit.services.scheduler import RequestScheduler
 
 
 SYSTEM_PROMPT = (
@@ -18,114 +32,510 @@ SYSTEM_PROMPT = (
 )
 
 
-def _b64_image(image_bytes: bytes) -> str:
-    return base64.b64encode(image_bytes).decode("utf-8")
+PACKED_PROMPT = (
+    SYSTEM_PROMPT.rsplit("Return STRICT JSON only", 1)[0]
+    + "You will receive {n} receipt images, each preceded by its label 'Receipt <index>'. "
+    "Return STRICT JSON only: an array of exactly {n} objects in receipt order, each with the keys "
+    "index, merchant_name, transaction_date, transaction_time, total_amount, currency_code, payment_method, category."
+)
+
+# Keys the model is asked for; each is an ExpenseEntry field.
+VISION_FIELDS: Tuple[str, ...] = (
+    "merchant_name",
+    "transaction_date",
+    "transaction_time",
+    "total_amount",
+    "currency_code",
+    "payment_method",
+    "category",
+)
+
+# Structured-output parse outcomes ("failed" replies fell back to the lenient parser).
+PARSE_STATS: Dict[str, int] = {"ok": 0, "failed": 0}
+
+# Rough per-request token cost (prompt + one high-detail image + reply) for rate limiting.
+EST_TOKENS_PER_REQUEST = 1100
+
+_SCHEDULER: Optional[RequestScheduler] = None
+
+# Connection pool size of the shared async clients; per-call concurrency is
+# bounded separately by extract_many's semaphore.
+ASYNC_POOL_SIZE = 64
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Optional[str], Optional[str]], AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+# Cumulative API usage, split by request mode ("single" / "packed").
+_USAGE: Dict[str, Dict[str, float]] = {}
+
+
+def _record_usage(mode: str, completion: Any, receipts: int, seconds: float) -> None:
+    stats = _USAGE.setdefault(
+        mode, {"requests": 0, "receipts": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0, "fallbacks": 0}
+    )
+    usage = getattr(completion, "usage", None)
+    stats["requests"] += 1
+    stats["receipts"] += receipts
+    stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    stats["seconds"] += seconds
 
 
-def extract_expense_fields(image_bytes: bytes, file_name: str, model: str = "gpt-4o-mini") -> Dict[str, Any]:
+def usage_stats() -> Dict[str, Dict[str, float]]:
+    """Per-mode totals plus per-receipt latency and token averages."""
+    out = {}
+    for mode, stats in _USAGE.items():
+        n = max(stats["receipts"], 1)
+        out[mode] = {
+            **stats,
+            "seconds_per_receipt": stats["seconds"] / n,
+            "tokens_per_receipt": (stats["prompt_tokens"] + stats["completion_tokens"]) / n,
+        }
+    return out
+
+
+def default_scheduler() -> RequestScheduler:
     """
-    Calls OpenAI Vision to extract expense fields from an image.
-    Returns a dict with canonical keys suitable for ExpenseEntry.
+    Process-wide scheduler used when callers pass none, so separate calls share
+    one set of rate buckets and one circuit breaker.
+    """
+    global _SCHEDULER
+    with _LOOP_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = RequestScheduler()
+        return _SCHEDULER
+
+
+def _get_async_client(base_url: Optional[str] = None, api_key: Optional[str] = None) -> AsyncOpenAI:
     """
-    client = OpenAI()
+    Long-lived pooled client per ``(base_url, api_key)`` for the running loop.
+    httpx connections belong to one event loop, so clients are kept per loop.
+    """
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get((base_url, api_key))
+    if client is None:
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=ASYNC_POOL_SIZE, max_keepalive_connections=ASYNC_POOL_SIZE),
+        )
+        client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client, max_retries=0)
+        clients[(base_url, api_key)] = client
+    return client
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop on a daemon thread, so blocking callers share pooled clients."""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="xpenseit-vision", daemon=True).start()
+        return _LOOP
+
+
+def _b64_image(image_bytes: bytes) -> str:
+    return base64.b64encode(image_bytes).decode("utf-8")
+
 
+def _build_messages(image_bytes: bytes, mime: str = "image/png") -> List[Dict[str, Any]]:
     img_b64 = _b64_image(image_bytes)
     user_content = [
         {"type": "text", "text": SYSTEM_PROMPT},
         {
             "type": "image_url",
-            "image_url": {"url": f"data:image/png;base64,{img_b64}"},
+            "image_url": {"url": f"data:{mime};base64,{img_b64}"},
         },
     ]
+    return [{"role": "user", "content": user_content}]
 
+
+def _parse_response_text(text: str) -> Dict[str, Any]:
+    # Try to parse JSON from the response. Model should return pure JSON.
+    data = None
     try:
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": user_content}],
-            temperature=0.1,
-        )
-        text = completion.choices[0].message.content or "{}"
-        # Try to parse JSON from the response. Model should return pure JSON.
-        data = None
-        try:
-            data = json.loads(text)
-        except Exception:
-            # Attempt to extract JSON substring if extra text leaked
-            start = text.find("{")
-            end = text.rfind("}")
-            if start != -1 and end != -1 and end > start:
-                data = json.loads(text[start : end + 1])
-        if not isinstance(data, dict):
-            data = {}
+        data = json.loads(text)
     except Exception:
+        # Attempt to extract JSON substring if extra text leaked
+        start = text.find("{")
+        end = text.rfind("}")
+        if start != -1 and end != -1 and end > start:
+            data = json.loads(text[start : end + 1])
+    if not isinstance(data, dict):
         data = {}
+    return data
+
+
+def _payload(image_bytes: bytes, preprocess: bool) -> Tuple[bytes, str]:
+    if not preprocess:
+        return image_bytes, "image/png"
+    prepared = prepare_image(image_bytes)
+    return prepared.data, prepared.mime
+
+
+def _build_packed_messages(payloads: Sequence[Tuple[bytes, str]]) -> List[Dict[str, Any]]:
+    user_content: List[Dict[str, Any]] = [{"type": "text", "text": PACKED_PROMPT.format(n=len(payloads))}]
+    for i, (data, mime) in enumerate(payloads):
+        user_content.append({"type": "text", "text": f"Receipt {i}"})
+        user_content.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{_b64_image(data)}"}})
+    return [{"role": "user", "content": user_content}]
+
+
+def _parse_packed_text(text: str, n: int) -> Optional[List[Dict[str, Any]]]:
+    """Per-receipt dicts in input order, or None if the reply does not match ``n`` receipts."""
+    data: Any = None
+    try:
+        data = json.loads(text)
+    except Exception:
+        start = text.find("[")
+        end = text.rfind("]")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(text[start : end + 1])
+            except Exception:
+                return None
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), None)
+    if not isinstance(data, list) or len(data) != n or not all(isinstance(d, dict) for d in data):
+        return None
+    indices = [d.get("index") for d in data]
+    if all(isinstance(i, int) for i in indices):
+        if sorted(indices) != list(range(n)):
+            return None
+        data = sorted(data, key=lambda d: d["index"])
+    return data
+
+
+def _json_schema_type(annotation: Any) -> str:
+    base = next((a for a in getattr(annotation, "__args__", (annotation,)) if a is not type(None)), annotation)
+    return "number" if base in (float, int) else "string"
+
+
+def _expense_json_schema() -> Dict[str, Any]:
+    """Strict JSON schema for the Vision reply, typed from ExpenseEntry's fields."""
+    enums = {"category": DEFAULT_CATEGORIES, "payment_method": DEFAULT_PAYMENT_METHODS}
+    properties: Dict[str, Any] = {}
+    for name in VISION_FIELDS:
+        prop: Dict[str, Any] = {"type": [_json_schema_type(ExpenseEntry.model_fields[name].annotation), "null"]}
+        if name in enums:
+            prop["enum"] = [*enums[name], None]
+        properties[name] = prop
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(VISION_FIELDS),
+        "additionalProperties": False,
+    }
+
+
+def _completion_kwargs(structured: bool) -> Dict[str, Any]:
+    if not structured:
+        return {}
+    return {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "expense_fields", "strict": True, "schema": EXPENSE_JSON_SCHEMA},
+        }
+    }
+
 
-    # Normalize fields
-    result: Dict[str, Any] = {
+def _fields_from_text(text: str, file_name: str, structured: bool) -> Dict[str, Any]:
+    """
+    Structured replies are parsed and normalized in one pass by the compiled
+    _VisionFields validator; anything it rejects falls back to the lenient parser.
+    """
+    if structured:
+        try:
+            result = _VisionFields.model_validate_json(text).model_dump()
+            PARSE_STATS["ok"] += 1
+            result["source_name"] = file_name
+            return result
+        except ValidationError:
+            PARSE_STATS["failed"] += 1
+    return _normalize_fields(_parse_response_text(text), file_name)
+
+
+def _normalize_fields(data: Dict[str, Any], file_name: str) -> Dict[str, Any]:
+    return {
         "merchant_name": _norm_str(data.get("merchant_name")),
-        "transaction_date": _norm_date(data.get("transaction_date")),
-        "transaction_time": _norm_time(data.get("transaction_time")),
-        "total_amount": _norm_float(data.get("total_amount")),
-        "currency_code": _norm_currency(data.get("currency_code")),
+        "transaction_date": parse_date(data.get("transaction_date")),
+        "transaction_time": parse_time(data.get("transaction_time")),
+        "total_amount": parse_amount(data.get("total_amount")),
+        "currency_code": infer_currency(data.get("currency_code"), data.get("merchant_name")),
         "payment_method": _norm_str(data.get("payment_method")),
         "category": _norm_str(data.get("category")),
         "source_name": file_name,
     }
-    return result
 
 
-def _norm_str(value: Any) -> Optional[str]:
-    if value is None:
-        return None
-    s = str(value).strip()
-    return s or None
+def extract_expense_fields(
+    image_bytes: bytes,
+    file_name: str,
+    model: str = "gpt-4o-mini",
+    cache: Optional[ExtractionCache] = None,
+    preprocess: bool = True,
+    structured: bool = False,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    scheduler: Optional[RequestScheduler] = None,
+) -> Dict[str, Any]:
+    """
+    Calls OpenAI Vision to extract expense fields from an image.
+    Returns a dict with canonical keys suitable for ExpenseEntry.
+    When a cache is given, a hit skips the API call altogether.
+    With ``preprocess`` the image is downsized and recompressed before upload.
+    With ``structured`` the reply is constrained by EXPENSE_JSON_SCHEMA.
+    Like extract_many, the call goes through ``scheduler`` (the shared
+    default_scheduler() if omitted) and the dict carries an ``error`` key that
+    is ``None`` on success.
+    """
+    return extract_many(
+        [(image_bytes, file_name)],
+        model=model,
+        concurrency=1,
+        base_url=base_url,
+        api_key=api_key,
+        cache=cache,
+        preprocess=preprocess,
+        scheduler=scheduler,
+        structured=structured,
+    )[0]
 
 
-def _norm_float(value: Any) -> Optional[float]:
-    if value is None:
-        return None
+async def _extract_one_async(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    scheduler: RequestScheduler,
+    image_bytes: bytes,
+    file_name: str,
+    model: str,
+    preprocess: bool,
+    structured: bool = False,
+) -> Dict[str, Any]:
+    error: Optional[str] = None
     try:
-        s = str(value).replace(",", "")
-        return float(s)
-    except Exception:
-        return None
+        payload, mime = await asyncio.to_thread(_payload, image_bytes, preprocess)
+        messages = _build_messages(payload, mime)
+        extra = _completion_kwargs(structured)
+        async with semaphore:
+            started = time.perf_counter()
+            completion = await scheduler.run(
+                lambda: client.chat.completions.create(model=model, messages=messages, temperature=0.1, **extra),
+                est_tokens=EST_TOKENS_PER_REQUEST,
+                usage=lambda c: getattr(c.usage, "total_tokens", None),
+            )
+            _record_usage("single", completion, 1, time.perf_counter() - started)
+        text = completion.choices[0].message.content or "{}"
+        result = _fields_from_text(text, file_name, structured)
+    except Exception as ex:
+        result = _normalize_fields({}, file_name)
+        error = f"{type(ex).__name__}: {ex}"
+    result["error"] = error
+    return result
 
 
-def _norm_currency(value: Any) -> str:
-    if not value:
-        return "USD"
-    s = str(value).upper().strip()
-    if len(s) == 1:  # symbols
-        return {"$": "USD"}.get(s, "USD")
-    return s
+async def _extract_pack_async(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    scheduler: RequestScheduler,
+    items: Sequence[Tuple[bytes, str]],
+    model: str,
+    preprocess: bool,
+) -> List[Dict[str, Any]]:
+    """
+    Extract several receipts with one request. If the reply cannot be split into
+    exactly one object per receipt, each receipt is retried as a single-image call.
+    """
+    try:
+        payloads = await asyncio.to_thread(lambda: [_payload(b, preprocess) for b, _ in items])
+        messages = _build_packed_messages(payloads)
+        async with semaphore:
+            started = time.perf_counter()
+            completion = await scheduler.run(
+                lambda: client.chat.completions.create(model=model, messages=messages, temperature=0.1),
+                est_tokens=EST_TOKENS_PER_REQUEST * len(items),
+                usage=lambda c: getattr(c.usage, "total_tokens", None),
+            )
+            _record_usage("packed", completion, len(items), time.perf_counter() - started)
+    except Exception as ex:
+        error = f"{type(ex).__name__}: {ex}"
+        return [{**_normalize_fields({}, name), "error": error} for _, name in items]
 
+    parsed = _parse_packed_text(completion.choices[0].message.content or "", len(items))
+    if parsed is None:
+        _USAGE["packed"]["fallbacks"] += 1
+        return list(
+            await asyncio.gather(
+                *[_extract_one_async(client, semaphore, scheduler, b, name, model, preprocess) for b, name in items]
+            )
+        )
+    return [{**_normalize_fields(data, name), "error": None} for data, (_, name) in zip(parsed, items)]
 
-def _norm_date(value: Any):
-    if not value:
-        return None
-    try:
-        dt = datetime.fromisoformat(str(value))
-        return dt.date()
-    except Exception:
-        # Try common formats
-        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%m-%d-%Y"):
-            try:
-                return datetime.strptime(str(value), fmt).date()
-            except Exception:
+
+async def extract_many_async(
+    images: Sequence[Tuple[bytes, str]],
+    model: str = "gpt-4o-mini",
+    concurrency: int = 8,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    cache: Optional[ExtractionCache] = None,
+    preprocess: bool = True,
+    scheduler: Optional[RequestScheduler] = None,
+    pack_size: int = 1,
+    structured: bool = False,
+    client: Optional[AsyncOpenAI] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extracts expense fields for many ``(image_bytes, file_name)`` pairs concurrently.
+
+    At most ``concurrency`` requests are in flight at once and all of them share
+    ``client``, or a long-lived pooled client per ``(base_url, api_key)`` that
+    later calls on the same event loop reuse. Results come back in input order; each dict carries an
+    ``error`` key that is ``None`` on success, so one failing receipt never aborts
+    the batch. ``base_url`` lets the batch run against a local fake endpoint.
+    Cache hits are resolved up front and never reach the network. Calls go through
+    ``scheduler`` (the shared default_scheduler() if omitted) for rate limiting, retry
+    with backoff and circuit breaking; the client's own retries are disabled.
+    ``pack_size`` > 1 sends that many receipts per request to amortize the prompt;
+    see usage_stats() to compare latency and tokens per receipt against single mode.
+    ``structured`` requests schema-constrained replies (single-image calls only).
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+    keys: List[Optional[str]] = [None] * len(images)
+    pending: List[int] = []
+    for i, (image_bytes, file_name) in enumerate(images):
+        if cache is not None:
+            keys[i] = make_key(image_bytes, model, SYSTEM_PROMPT, current_region())
+            cached = cache.get(keys[i])
+            if cached is not None:
+                cached["source_name"] = file_name
+                cached["error"] = None
+                results[i] = cached
                 continue
-        return None
+        pending.append(i)
+
+    if pending:
+        concurrency = max(1, int(concurrency))
+        semaphore = asyncio.Semaphore(concurrency)
+        scheduler = scheduler or default_scheduler()
+        client = client or _get_async_client(base_url, api_key)
+
+        def store(indices: Sequence[int], fetched: Sequence[Dict[str, Any]]) -> None:
+            # Written as each request completes, so an interrupted batch keeps its finished work.
+            for i, result in zip(indices, fetched):
+                results[i] = result
+                if cache is not None and result["error"] is None:
+                    cache.put(keys[i], result)
+
+        async def run_pack(pack: List[int]) -> None:
+            fetched = await _extract_pack_async(
+                client, semaphore, scheduler, [images[i] for i in pack], model, preprocess
+            )
+            store(pack, fetched)
+
+        async def run_one(i: int) -> None:
+            image_bytes, file_name = images[i]
+            result = await _extract_one_async(
+                client, semaphore, scheduler, image_bytes, file_name, model, preprocess, structured
+            )
+            store([i], [result])
+
+        if pack_size > 1:
+            await asyncio.gather(*[run_pack(pending[j : j + pack_size]) for j in range(0, len(pending), pack_size)])
+        else:
+            await asyncio.gather(*[run_one(i) for i in pending])
+    return results  # type: ignore[return-value]
+
+
+def submit_many(
+    images: Sequence[Tuple[bytes, str]],
+    model: str = "gpt-4o-mini",
+    concurrency: int = 8,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    cache: Optional[ExtractionCache] = None,
+    preprocess: bool = True,
+    scheduler: Optional[RequestScheduler] = None,
+    pack_size: int = 1,
+    structured: bool = False,
+) -> "concurrent.futures.Future[List[Dict[str, Any]]]":
+    """
+    Start :func:`extract_many_async` on the shared background loop and return a
+    future for its results, so a caller can keep several batches in flight.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        extract_many_async(
+            images,
+            model=model,
+            concurrency=concurrency,
+            base_url=base_url,
+            api_key=api_key,
+            cache=cache,
+            preprocess=preprocess,
+            scheduler=scheduler,
+            pack_size=pack_size,
+            structured=structured,
+        ),
+        _background_loop(),
+    )
 
 
-def _norm_time(value: Any) -> Optional[str]:
-    if not value:
+def extract_many(
+    images: Sequence[Tuple[bytes, str]],
+    model: str = "gpt-4o-mini",
+    concurrency: int = 8,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    cache: Optional[ExtractionCache] = None,
+    preprocess: bool = True,
+    scheduler: Optional[RequestScheduler] = None,
+    pack_size: int = 1,
+    structured: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Blocking wrapper around :func:`extract_many_async`. Runs on a shared
+    background loop, so repeated calls keep their pooled connections and the
+    scheduler's buckets.
+    """
+    return submit_many(
+        images,
+        model=model,
+        concurrency=concurrency,
+        base_url=base_url,
+        api_key=api_key,
+        cache=cache,
+        preprocess=preprocess,
+        scheduler=scheduler,
+        pack_size=pack_size,
+        structured=structured,
+    ).result()
+
+
+def _norm_str(value: Any) -> Optional[str]:
+    if value is None:
         return None
     s = str(value).strip()
-    # Basic sanity: HH:MM variants
-    parts = s.split(":")
-    if len(parts) >= 2 and all(p.isdigit() for p in parts[:2]):
-        hh = int(parts[0]) % 24
-        mm = int(parts[1]) % 60
-        return f"{hh:02d}:{mm:02d}"
-    return None
+    return s or None
+
+
+class _VisionFields(BaseModel):
+    """Compiled validator that parses and normalizes a structured reply in one pass."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    merchant_name: Annotated[Optional[str], BeforeValidator(_norm_str)] = None
+    transaction_date: Annotated[Optional[date], BeforeValidator(parse_date)] = None
+    transaction_time: Annotated[Optional[str], BeforeValidator(parse_time)] = None
+    total_amount: Annotated[Optional[float], BeforeValidator(parse_amount)] = None
+    currency_code: str = Field(default="", validate_default=True)
+    payment_method: Annotated[Optional[str], BeforeValidator(_norm_str)] = None
+    category: Annotated[Optional[str], BeforeValidator(_norm_str)] = None
+
+    @field_validator("currency_code", mode="before")
+    @classmethod
+    def _currency(cls, value: Any, info: ValidationInfo) -> str:
+        # merchant_name is declared first, so its normalized value is available as a hint.
+        return infer_currency(value, info.data.get("merchant_name"))
 
 
+EXPENSE_JSON_SCHEMA: Dict[str, Any] = _expense_json_schema()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import fitz  # PyMuPDF
+
+from xpenseit.services.extraction_cache import ExtractionCache
+from xpenseit.services.normalize import find_currency, parse_amount, parse_date
+from xpenseit.services.openai_vision import _normalize_fields, extract_expense_fields
+from xpenseit.services.pdf_utils import _render_page
+
+
+# Pages with fewer extractable characters than this are treated as scans.
+MIN_TEXT_CHARS = 40
+
+_AMOUNT = r"([0-9]{1,3}(?:[., ][0-9]{3})*(?:[.,][0-9]{2})|[0-9]+(?:[.,][0-9]{2})?)"
+_TOTAL_RE = re.compile(
+    r"\b(grand\s+total|total\s+a\s+pagar|amount\s+due|balance\s+due|total\s+due|importe\s+total|total)"
+    r"([^0-9\n]{0,20})" + _AMOUNT,
+    re.IGNORECASE,
+)
+# Keyword-less fallback only trusts money-shaped numbers, not invoice numbers or years.
+_DECIMAL_AMOUNT_RE = re.compile(r"(?<![0-9.,])([0-9]{1,3}(?:[., ][0-9]{3})*[.,][0-9]{2}|[0-9]+[.,][0-9]{2})(?![0-9])")
+_MONEY_SIGN_RE = re.compile(r"[$€£¥]")
+_CENTS_RE = re.compile(r"[.,][0-9]{2}$")
+_DATE_RES = [
+    re.compile(r"\b(\d{4}-\d{2}-\d{2})\b"),
+    re.compile(r"\b(\d{1,2}[/-]\d{1,2}[/-]\d{4})\b"),
+    re.compile(r"\b(\d{1,2}\s+[A-Za-z]{3,9}\.?\s+\d{4})\b"),
+    re.compile(r"\b([A-Za-z]{3,9}\.?\s+\d{1,2},?\s+\d{4})\b"),
+]
+_TIME_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_CATEGORY_HINTS = [
+    (re.compile(r"\b(hotel|inn|suites|resort|folio|lodging|hospedaje)\b", re.I), "Lodging"),
+    (re.compile(r"\b(uber|lyft|didi|taxi|airline|airlines|aerom[eé]xico|volaris|boarding|flight)\b", re.I), "Transportation"),
+    (re.compile(r"\b(parking|estacionamiento)\b", re.I), "Parking"),
+    (re.compile(r"\b(toll|caseta|peaje)\b", re.I), "Toll"),
+    (re.compile(r"\b(gas|fuel|gasolina|pemex|shell)\b", re.I), "Gas Station"),
+    (re.compile(r"\b(restaurant|restaurante|cafe|caf[eé]|bar|grill|food)\b", re.I), "Food & Meals"),
+]
+
+
+def _date_value(raw: str) -> Optional[str]:
+    parsed = parse_date(raw)
+    return parsed.isoformat() if parsed else None
+
+
+def _keyword_total(text: str) -> Optional[float]:
+    """
+    Amount on the strongest "total" line. Bare integers ("Items total 3") only
+    count with a currency sign; specific keywords (grand total, amount due) beat
+    a plain "total", and within a tier the largest amount wins over tax or
+    savings totals.
+    """
+    best: Optional[Tuple[int, float]] = None
+    for m in _TOTAL_RE.finditer(text):
+        raw = m.group(3)
+        if not _CENTS_RE.search(raw) and not _MONEY_SIGN_RE.search(m.group(2)):
+            continue
+        amount = parse_amount(raw)
+        if amount is None:
+            continue
+        candidate = (0 if m.group(1).lower() == "total" else 1, amount)
+        if best is None or candidate > best:
+            best = candidate
+    return best[1] if best else None
+
+
+def _first_line(text: str) -> Optional[str]:
+    for line in text.splitlines():
+        line = line.strip()
+        letters = sum(ch.isalpha() for ch in line)
+        if letters >= 3 and letters >= len(line) / 2:
+            return line[:80]
+    return None
+
+
+def parse_receipt_text(text: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Rule-based parse of a text layer into raw Vision-style fields.
+    Returns ``(fields, confidence)`` with confidence in [0, 1].
+    """
+    fields: Dict[str, Any] = {}
+    confidence = 0.0
+
+    total = _keyword_total(text)
+    if total is not None:
+        fields["total_amount"] = total
+        confidence += 0.45
+    else:
+        amounts = [parse_amount(m.group(1)) for m in _DECIMAL_AMOUNT_RE.finditer(text)]
+        amounts = [a for a in amounts if a is not None]
+        if amounts:
+            # Largest money amount is a guess; weighted so that, without a total
+            # keyword, the page can never clear the default threshold alone.
+            fields["total_amount"] = max(amounts)
+            confidence += 0.05
+
+    for rx in _DATE_RES:
+        m = rx.search(text)
+        parsed = _date_value(m.group(1)) if m else None
+        if parsed:
+            fields["transaction_date"] = parsed
+            confidence += 0.25
+            break
+
+    m = _TIME_RE.search(text)
+    if m:
+        fields["transaction_time"] = f"{m.group(1)}:{m.group(2)}"
+
+    currency = find_currency(text)
+    if currency:
+        fields["currency_code"] = currency
+        confidence += 0.15
+
+    merchant = _first_line(text)
+    if merchant:
+        fields["merchant_name"] = merchant
+        confidence += 0.15
+
+    for rx, category in _CATEGORY_HINTS:
+        if rx.search(text):
+            fields["category"] = category
+            break
+
+    return fields, round(min(confidence, 1.0), 2)
+
+
+def iter_pdf_pages(
+    pdf_bytes: bytes,
+    file_name: str,
+    dpi: int = 200,
+    min_confidence: float = 0.7,
+    preview_dpi: Optional[int] = None,
+) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[bytes]]]:
+    """
+    Yield ``(fields, image)`` per page.
+
+    Confidently parsed text pages give normalized fields and, with ``preview_dpi``,
+    a low-resolution render for the report; other pages give ``(None, image)``
+    rendered at ``dpi`` for Vision.
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            text = page.get_text("text") or ""
+            if len(text.strip()) >= MIN_TEXT_CHARS:
+                fields, confidence = parse_receipt_text(text)
+                if confidence >= min_confidence:
+                    preview = _render_page(page, preview_dpi) if preview_dpi else None
+                    yield _normalize_fields(fields, file_name), preview
+                    continue
+            yield None, _render_page(page, dpi)
+
+
+def extract_pdf_expenses(
+    pdf_bytes: bytes,
+    file_name: str,
+    model: str = "gpt-4o-mini",
+    dpi: int = 200,
+    min_confidence: float = 0.7,
+    cache: Optional[ExtractionCache] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extract one expense dict per PDF page, preferring the embedded text layer.
+
+    Pages whose text parses with at least ``min_confidence`` never reach Vision;
+    scanned or ambiguous pages are rasterized and sent to extract_expense_fields.
+    Each dict carries an ``error`` key that is ``None`` unless the Vision call failed.
+    """
+    results: List[Dict[str, Any]] = []
+    for fields, image in iter_pdf_pages(pdf_bytes, file_name, dpi, min_confidence):
+        if fields is None:
+            fields = extract_expense_fields(image, file_name, model=model, cache=cache)
+        else:
+            fields["error"] = None
+        results.append(fields)
+    return results
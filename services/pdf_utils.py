@@ -1,18 +1,56 @@
 from __future__ import annotations
 
-from typing import List
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
 import fitz  # PyMuPDF
 
 
-def pdf_to_images(pdf_bytes: bytes, dpi: int = 200) -> List[bytes]:
-    """Render each PDF page to PNG bytes."""
-    images: List[bytes] = []
+def _render_page(page: "fitz.Page", dpi: int) -> bytes:
+    zoom = dpi / 72.0
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+    return pix.tobytes("png")
+
+
+def _render_range(pdf_bytes: bytes, start: int, stop: int, dpi: int) -> List[bytes]:
+    """Worker: open a private document and render pages [start, stop)."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [_render_page(doc[i], dpi) for i in range(start, stop)]
+
+
+def page_count(pdf_bytes: bytes) -> int:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count
+
+
+def iter_pdf_images(pdf_bytes: bytes, dpi: int = 200) -> Iterator[bytes]:
+    """Yield PNG bytes page by page so only one rendered page is held at a time."""
     with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
         for page in doc:
-            zoom = dpi / 72.0
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            images.append(pix.tobytes("png"))
-    return images
+            yield _render_page(page, dpi)
+
+
+def pdf_to_images(pdf_bytes: bytes, dpi: int = 200, workers: Optional[int] = None) -> List[bytes]:
+    """
+    Render each PDF page to PNG bytes.
 
+    With ``workers`` > 1 the page range is split into contiguous chunks rendered in
+    separate processes, each opening its own document; page order is preserved.
+    """
+    if not workers or workers <= 1:
+        return list(iter_pdf_images(pdf_bytes, dpi))
 
+    n_pages = page_count(pdf_bytes)
+    workers = min(workers, os.cpu_count() or 1, n_pages)
+    if workers <= 1:
+        return list(iter_pdf_images(pdf_bytes, dpi))
+
+    chunk = -(-n_pages // workers)
+    bounds = [(start, min(start + chunk, n_pages)) for start in range(0, n_pages, chunk)]
+    images: List[bytes] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_range, pdf_bytes, start, stop, dpi) for start, stop in bounds]
+        for fut in futures:
+            images.extend(fut.result())
+    return images
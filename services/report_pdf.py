@@ -1,22 +1,183 @@
 from __future__ import annotations
 
-from typing import List
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
 from io import BytesIO
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle, PageBreak, Flowable
 from reportlab.lib.units import inch
 from reportlab.lib.utils import ImageReader
 from PIL import Image as PILImage
 
 from xpenseit.models import ReportHeader, ExpenseEntry
+from xpenseit.services.blob_store import BlobStore
+from xpenseit.services.totals import ReportTotals, totals_for_entries
 from datetime import date as _date
 
 
-def build_pdf_report(header: ReportHeader, entries: List[ExpenseEntry], usd_to_mxn: float, logo_path: str | None) -> bytes:
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter, topMargin=36, bottomMargin=36, leftMargin=36, rightMargin=36)
+RECEIPT_MAX_W = 7.3 * inch
+RECEIPT_MAX_H = 9.0 * inch
+
+
+def _fit_box(iw_px: int, ih_px: int) -> Tuple[float, float]:
+    # scale from pixels to points to fit constraints
+    scale = min(RECEIPT_MAX_W / float(iw_px), RECEIPT_MAX_H / float(ih_px))
+    return iw_px * scale, ih_px * scale
+
+
+# Inline image bytes, or a callable opening a readable file-like (e.g. a BlobStore mmap).
+ImageSource = Union[bytes, Callable[[], BinaryIO]]
+
+
+def _open_source(source: ImageSource) -> BinaryIO:
+    return BytesIO(source) if isinstance(source, (bytes, bytearray)) else source()
+
+
+def _receipt_source(entry: ExpenseEntry, blob_store: Optional[BlobStore]) -> Optional[ImageSource]:
+    if entry._image_bytes:
+        return entry._image_bytes
+    if entry._image_ref and blob_store is not None:
+        return partial(blob_store.open, entry._image_ref)
+    return None
+
+
+def _transcode_receipt(
+    source: ImageSource,
+    target_w: float,
+    target_h: float,
+    dpi: Optional[int] = None,
+    grayscale: bool = False,
+) -> bytes:
+    """
+    Decode with PIL and re-encode as JPEG for ReportLab compatibility.
+    With ``dpi``, pixels are resampled down to that density for the target box (points).
+    """
+    target_px: Optional[Tuple[int, int]] = None
+    with _open_source(source) as fh:
+        pil = PILImage.open(fh)
+        if dpi:
+            target_px = (max(1, round(target_w / 72.0 * dpi)), max(1, round(target_h / 72.0 * dpi)))
+            # Lets the JPEG decoder skip straight to a reduced scale when possible.
+            pil.draft("L" if grayscale else "RGB", target_px)
+        pil.load()
+    if pil.mode in ("RGBA", "LA"):
+        bg = PILImage.new("RGB", pil.size, (255, 255, 255))
+        bg.paste(pil, mask=pil.split()[-1])
+        pil = bg
+    elif pil.mode not in ("RGB", "L"):
+        pil = pil.convert("RGB")
+    if grayscale and pil.mode != "L":
+        pil = pil.convert("L")
+    if target_px and pil.size[0] > target_px[0] and pil.size[1] > target_px[1]:
+        pil = pil.resize(target_px, PILImage.LANCZOS)
+
+    tmp = BytesIO()
+    pil.save(tmp, format="JPEG", quality=85)
+    return tmp.getvalue()
+
+
+class _TranscodeQueue:
+    """
+    Runs _transcode_receipt on a thread pool (Pillow releases the GIL while coding),
+    keeping at most ``window`` receipts encoded ahead of the one being drawn.
+    """
+
+    def __init__(self, workers: int, window: int):
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._window = max(1, window)
+        self._jobs: List[Optional[Callable[[], bytes]]] = []
+        self._futures: Dict[int, Future] = {}
+        self._submitted = 0
+
+    def add(self, job: Callable[[], bytes]) -> int:
+        self._jobs.append(job)
+        return len(self._jobs) - 1
+
+    def result(self, index: int) -> bytes:
+        stop = min(index + 1 + self._window, len(self._jobs))
+        while self._submitted < stop:
+            i = self._submitted
+            self._futures[i] = self._pool.submit(self._jobs[i])
+            self._jobs[i] = None
+            self._submitted += 1
+        return self._futures.pop(index).result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _ReceiptImage(Flowable):
+    """
+    Receipt image that is decoded and encoded only when drawn.
+
+    Sizing reads just the image header, so no pixel data is held while the rest of
+    the document is laid out, and the source reference is dropped after drawing.
+    With a queue, encoding happens on its worker threads in document order.
+    """
+
+    def __init__(
+        self,
+        source: ImageSource,
+        queue: Optional[_TranscodeQueue] = None,
+        dpi: Optional[int] = None,
+        grayscale: bool = False,
+    ):
+        super().__init__()
+        with _open_source(source) as fh, PILImage.open(fh) as probe:
+            self.width, self.height = _fit_box(*probe.size)
+        job = partial(_transcode_receipt, source, self.width, self.height, dpi, grayscale)
+        self._queue = queue
+        self._index = queue.add(job) if queue is not None else -1
+        self._job: Optional[Callable[[], bytes]] = job if queue is None else None
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        job, self._job = self._job, None
+        try:
+            if self._queue is not None:
+                jpeg = self._queue.result(self._index)
+            else:
+                jpeg = job()
+            self.canv.drawImage(ImageReader(BytesIO(jpeg)), 0, 0, width=self.width, height=self.height)
+        except Exception:
+            self.canv.drawString(0, self.height - 12, "[Unable to render image]")
+
+
+def build_pdf_report(
+    header: ReportHeader,
+    entries: List[ExpenseEntry],
+    usd_to_mxn: float,
+    logo_path: str | None,
+    output: Union[str, BinaryIO, None] = None,
+    image_workers: Optional[int] = None,
+    image_dpi: Optional[int] = 150,
+    grayscale_receipts: bool = False,
+    totals: Optional[ReportTotals] = None,
+    blob_store: Optional[BlobStore] = None,
+    rates: Optional[Dict[str, float]] = None,
+) -> Optional[bytes]:
+    """
+    Build the expense report PDF.
+
+    Returns the PDF bytes, or writes straight to ``output`` (a path or writable
+    binary stream) and returns None. Receipt images are decoded lazily page by page,
+    transcoded on ``image_workers`` threads (default: up to 4; 0 or 1 = inline) and
+    resampled to ``image_dpi`` for their printed size (None keeps full resolution).
+    Pass precomputed ``totals`` to reuse the aggregation shared with the other exports,
+    or ``rates`` (units per 1 USD, e.g. from fetch_rates) to convert other currencies.
+    Entries holding only an image reference are read from ``blob_store`` when drawn.
+    """
+    if image_workers is None:
+        image_workers = min(4, os.cpu_count() or 1)
+    queue = _TranscodeQueue(image_workers, window=2 * image_workers) if image_workers > 1 else None
+    buf = BytesIO() if output is None else None
+    doc = SimpleDocTemplate(output if output is not None else buf, pagesize=letter, topMargin=36, bottomMargin=36, leftMargin=36, rightMargin=36)
     styles = getSampleStyleSheet()
     cell_style = ParagraphStyle(
         "cell8",
@@ -89,56 +250,38 @@ def build_pdf_report(header: ReportHeader, entries: List[ExpenseEntry], usd_to_m
     flow.append(expenses_table)
 
     # Subtotals and totals
-    usd_sub = sum((e.total_amount or 0.0) for e in entries if (e.currency_code or "").upper() == "USD")
-    mxn_sub = sum((e.total_amount or 0.0) for e in entries if (e.currency_code or "").upper() == "MXN")
-    total_usd = usd_sub + (mxn_sub / usd_to_mxn if usd_to_mxn else 0.0)
-    total_mxn = mxn_sub + (usd_sub * usd_to_mxn)
+    if totals is None:
+        totals = totals_for_entries(entries, header, usd_to_mxn=usd_to_mxn, rates=rates)
+    cells = [cell for pair in totals.rows() for cell in pair]
+    cells += [""] * (-len(cells) % 4)
 
     flow.append(Spacer(1, 8))
-    totals = Table([
-        ["Subtotal USD", f"{usd_sub:,.2f} USD", "Subtotal MXN", f"{mxn_sub:,.2f} MXN"],
-        ["Total USD", f"{total_usd:,.2f} USD", "Total MXN", f"{total_mxn:,.2f} MXN"],
-    ], colWidths=[0.25*page_w, 0.25*page_w, 0.25*page_w, 0.25*page_w])
-    totals.setStyle(TableStyle([
+    totals_table = Table(
+        [cells[i:i + 4] for i in range(0, len(cells), 4)],
+        colWidths=[0.25*page_w, 0.25*page_w, 0.25*page_w, 0.25*page_w],
+    )
+    totals_table.setStyle(TableStyle([
         ("GRID", (0,0), (-1,-1), 0.25, colors.grey),
         ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
     ]))
-    flow.append(totals)
+    flow.append(totals_table)
 
     # Receipts pages
     for idx, e in enumerate(sorted_entries, start=1):
         flow.append(PageBreak())
         flow.append(Paragraph(f"<a name='rec{idx}'/>Receipt {idx}: {e.source_name or ''}", styles["Heading2"]))
-        if e._image_bytes:
+        source = _receipt_source(e, blob_store)
+        if source is not None:
             try:
-                # Decode with PIL and re-encode as JPEG for ReportLab compatibility
-                pil = PILImage.open(BytesIO(e._image_bytes))
-                pil.load()
-                if pil.mode in ("RGBA", "LA"):
-                    bg = PILImage.new("RGB", pil.size, (255, 255, 255))
-                    bg.paste(pil, mask=pil.split()[-1])
-                    pil = bg
-                elif pil.mode not in ("RGB", "L"):
-                    pil = pil.convert("RGB")
-
-                max_w = 7.3 * inch
-                max_h = 9.0 * inch
-                iw_px, ih_px = pil.size
-                # scale from pixels to points to fit constraints
-                scale = min(max_w / float(iw_px), max_h / float(ih_px))
-                target_w = iw_px * scale
-                target_h = ih_px * scale
-
-                tmp = BytesIO()
-                pil.save(tmp, format="JPEG", quality=85)
-                tmp.seek(0)
-
-                img = RLImage(tmp, width=target_w, height=target_h)
-                flow.append(img)
+                flow.append(_ReceiptImage(source, queue, image_dpi, grayscale_receipts))
             except Exception as ex:
                 flow.append(Paragraph(f"[Unable to render image]", styles["BodyText"]))
 
-    doc.build(flow)
-    return buf.getvalue()
+    try:
+        doc.build(flow)
+    finally:
+        if queue is not None:
+            queue.close()
+    return buf.getvalue() if buf is not None else None
 
 
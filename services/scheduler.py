@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at ``per_minute / 60`` units per second.
+    Balance may go negative via ``adjust`` when actual usage exceeds the estimate.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._level = self.capacity
+        self._stamp = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio locks bind to one loop; a scheduler shared across
+            # asyncio.run() calls (one per CLI batch) needs a fresh one per loop.
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._level >= amount:
+                    self._level -= amount
+                    return
+                await asyncio.sleep((amount - self._level) / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        self._refill()
+        self._level = min(self.capacity, self._level - delta)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls for
+    ``reset_timeout`` seconds; then lets a single probe through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self) -> float:
+        """Seconds until a call may be admitted again (a short poll while a probe is out)."""
+        if self._opened_at is None:
+            return 0.0
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        return remaining if remaining > 0 else 0.1
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open" or (state == "half-open" and self._probing):
+            raise CircuitOpenError("Vision API circuit open after repeated failures")
+        if state == "half-open":
+            self._probing = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """End a half-open probe that proved nothing either way (e.g. a 429)."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff; a server Retry-After is a lower bound."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(backoff, retry_after or 0.0)
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _is_rate_limit(exc: BaseException) -> bool:
+    return type(exc).__name__ == "RateLimitError" or _status(exc) == 429
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    name = type(exc).__name__
+    if name in ("APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError"):
+        return True
+    return _status(exc) in RETRYABLE_STATUS
+
+
+class RequestScheduler:
+    """
+    Paces API calls with request/minute and token/minute buckets, retries
+    transient failures with jittered backoff honoring Retry-After, and trips a
+    circuit breaker on sustained failure. ``stats`` counts what happened.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_open_wait: float = 300.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_open_wait = max_open_wait
+        self.stats: Dict[str, int] = {
+            "calls": 0, "retries": 0, "rate_limited": 0, "failures": 0, "breaker_waits": 0, "rejected": 0
+        }
+
+    async def _admit(self) -> None:
+        """Wait out an open breaker; give up only after ``max_open_wait`` seconds."""
+        waited = 0.0
+        while True:
+            try:
+                self.breaker.before_call()
+                return
+            except CircuitOpenError:
+                if waited >= self.max_open_wait:
+                    self.stats["rejected"] += 1
+                    raise
+            delay = min(self.breaker.retry_in(), self.max_open_wait - waited)
+            self.stats["breaker_waits"] += 1
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        est_tokens: int = 1000,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Run ``call`` under the limits. ``usage`` extracts actual tokens from the
+        result so the token bucket is corrected for the estimate's error.
+        """
+        attempt = 0
+        while True:
+            await self._admit()
+            await self.requests.acquire(1)
+            await self.tokens.acquire(est_tokens)
+            self.stats["calls"] += 1
+            try:
+                result = await call()
+            except Exception as ex:
+                retryable = is_retryable(ex)
+                if _is_rate_limit(ex):
+                    # Throttling is paced by backoff and the buckets, not the breaker.
+                    self.stats["rate_limited"] += 1
+                    self.breaker.release_probe()
+                elif retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The service answered; a bad request says nothing about its health.
+                    self.breaker.record_success()
+                attempt += 1
+                if not retryable or attempt >= self.policy.max_attempts:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.policy.delay(attempt, retry_after_seconds(ex)))
+                continue
+            self.breaker.record_success()
+            if usage is not None:
+                actual = usage(result)
+                if actual:
+                    self.tokens.adjust(actual - est_tokens)
+            return result
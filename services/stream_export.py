@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Union
+
+from xpenseit.models import ExpenseEntry
+from xpenseit.store import COLUMNS, ExpenseStore
+
+
+RowSource = Union[Iterable[ExpenseEntry], ExpenseStore]
+
+
+def iter_rows(source: RowSource) -> Iterator[Dict[str, Any]]:
+    """Rows shaped like ``ExpenseEntry.to_row()``, one at a time."""
+    if isinstance(source, ExpenseStore):
+        yield from source.iter_rows()
+    else:
+        for entry in source:
+            yield entry.to_row()
+
+
+def _blank_nan(value: Any) -> Any:
+    return "" if isinstance(value, float) and math.isnan(value) else value
+
+
+def _null_blank(column: str, value: Any) -> Any:
+    value = _blank_nan(value)
+    return None if column == "Total" and value == "" else value
+
+
+def iter_csv(source: RowSource, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """UTF-8 CSV in chunks of ``chunk_rows`` rows; memory stays bounded by one chunk."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    pending = 0
+    for row in iter_rows(source):
+        writer.writerow([_blank_nan(row[c]) for c in COLUMNS])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_ndjson(source: RowSource, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """Newline-delimited JSON, one compact object per row, in chunks."""
+    lines = []
+    for row in iter_rows(source):
+        lines.append(json.dumps({c: _null_blank(c, row[c]) for c in COLUMNS}, ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_chunks(chunks: Iterable[bytes], target: Union[str, BinaryIO]) -> int:
+    """Write chunks to a path or binary stream; returns the number of bytes written."""
+    written = 0
+    if isinstance(target, str):
+        with open(target, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                written += len(chunk)
+    else:
+        for chunk in chunks:
+            target.write(chunk)
+            written += len(chunk)
+    return written
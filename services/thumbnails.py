@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Optional
+
+from PIL import Image as PILImage, ImageOps
+
+
+def make_thumbnail(image_bytes: bytes, width: int = 320, quality: int = 80) -> bytes:
+    """Downscale an image to ``width`` pixels wide and encode it as JPEG."""
+    pil = PILImage.open(BytesIO(image_bytes))
+    # Lets the JPEG decoder skip straight to a reduced scale when possible.
+    pil.draft("RGB", (width, width * 4))
+    pil = ImageOps.exif_transpose(pil)
+    if pil.mode in ("RGBA", "LA"):
+        bg = PILImage.new("RGB", pil.size, (255, 255, 255))
+        bg.paste(pil, mask=pil.split()[-1])
+        pil = bg
+    elif pil.mode not in ("RGB", "L"):
+        pil = pil.convert("RGB")
+    if pil.size[0] > width:
+        height = max(1, round(pil.size[1] * width / pil.size[0]))
+        pil = pil.resize((width, height), PILImage.LANCZOS)
+    out = BytesIO()
+    pil.save(out, format="JPEG", quality=quality)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Bounded LRU of JPEG thumbnails keyed by (image hash, width).
+
+    With ``disk_dir`` set, thumbnails are also persisted there and reused across
+    processes; the in-memory LRU still bounds what is held in RAM.
+    """
+
+    def __init__(self, max_items: int = 512, disk_dir: Optional[str] = None):
+        self.max_items = max(1, int(max_items))
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.disk_dir, f"{key}.jpg") if self.disk_dir else None
+
+    def get(self, image_hash: str, width: int, load: Callable[[], bytes]) -> bytes:
+        """Return the thumbnail, calling ``load`` for the source image only on a miss."""
+        key = f"{image_hash}_{width}"
+        with self._lock:
+            thumb = self._items.get(key)
+            if thumb is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return thumb
+        path = self._disk_path(key)
+        if path and os.path.exists(path):
+            with open(path, "rb") as fh:
+                thumb = fh.read()
+            self.hits += 1
+        else:
+            thumb = make_thumbnail(load(), width)
+            self.misses += 1
+            if path:
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(thumb)
+                os.replace(tmp, path)
+        with self._lock:
+            self._items[key] = thumb
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return thumb
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "items": len(self._items)}
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from xpenseit.models import ExpenseEntry, ReportHeader
+from xpenseit.services.currency import convert_many
+
+
+# Currencies always shown in totals, matching the report's historical USD/MXN layout.
+DISPLAY_CURRENCIES: Tuple[str, ...] = ("USD", "MXN")
+
+
+@dataclass
+class ReportTotals:
+    base_currency: str
+    subtotals: Dict[str, float]
+    totals: Dict[str, float]
+    unconverted: List[str] = field(default_factory=list)
+    by_category: Dict[str, float] = field(default_factory=dict)
+    by_date: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def base_total(self) -> float:
+        return self.totals.get(self.base_currency, 0.0)
+
+    def rows(self) -> List[Tuple[str, str]]:
+        """(label, formatted value) pairs shared by the PDF and Excel outputs."""
+        out = [(f"Subtotal {c}", f"{v:,.2f} {c}") for c, v in self.subtotals.items()]
+        out += [(f"Total {c}", f"{v:,.2f} {c}") for c, v in self.totals.items()]
+        if self.unconverted:
+            out.append(("Not converted", ", ".join(self.unconverted)))
+        return out
+
+
+def header_rates(usd_to_mxn: float, extra: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Rate table (units per 1 USD) built from the report's USD->MXN FX input.
+    ``extra`` adds other USD-based rates, e.g. ``fetch_rates("USD")``; the
+    report's own FX input still wins for MXN.
+    """
+    rates = {k.upper(): float(v) for k, v in (extra or {}).items() if v}
+    rates["USD"] = 1.0
+    if usd_to_mxn:
+        rates["MXN"] = float(usd_to_mxn)
+    return rates
+
+
+def entry_columns(entries: Iterable[ExpenseEntry]) -> Dict[str, np.ndarray]:
+    """Columns from entries; dates stay ``date`` objects and are formatted once per group."""
+    entries = list(entries)
+    return {
+        "amount": np.fromiter(
+            (e.total_amount if e.total_amount is not None else 0.0 for e in entries), dtype=float, count=len(entries)
+        ),
+        "currency": np.asarray([(e.currency_code or "").upper() for e in entries], dtype=object),
+        "category": np.asarray([e.category or "" for e in entries], dtype=object),
+        "date": np.asarray([e.transaction_date for e in entries], dtype=object),
+    }
+
+
+def frame_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Columns from a frame shaped like ``ExpenseEntry.to_row()`` output."""
+    def col(name: str) -> pd.Series:
+        return df[name] if name in df else pd.Series([""] * len(df), index=df.index)
+
+    return {
+        "amount": pd.to_numeric(col("Total"), errors="coerce").fillna(0.0).to_numpy(dtype=float),
+        "currency": col("Currency").fillna("").astype(str).str.upper().to_numpy(dtype=object),
+        "category": col("Category").fillna("").astype(str).to_numpy(dtype=object),
+        "date": col("Date").fillna("").astype(str).to_numpy(dtype=object),
+    }
+
+
+def _group_label(key: object) -> str:
+    if key is None or key != key:  # None / NaN
+        return ""
+    return key.isoformat() if isinstance(key, date) else str(key)
+
+
+def _grouped_sum(keys: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    """Sums per key, sorted by label. Groups by hash, so cost stays linear in rows."""
+    if len(keys) == 0:
+        return {}
+    codes, uniq = pd.factorize(keys, use_na_sentinel=False)
+    sums = np.bincount(codes, weights=values, minlength=len(uniq))
+    out: Dict[str, float] = {}
+    for key, total in zip(uniq, sums.tolist()):
+        label = _group_label(key)
+        out[label] = out.get(label, 0.0) + total
+    return dict(sorted(out.items()))
+
+
+def compute_totals(
+    columns: Dict[str, np.ndarray],
+    base_currency: str,
+    rates: Dict[str, float],
+    by_category: bool = False,
+    by_date: bool = False,
+) -> ReportTotals:
+    """
+    Aggregate expense columns in one pass.
+
+    Subtotals are grouped per currency with a single bincount; grand totals are then
+    derived from those subtotals for the base currency and DISPLAY_CURRENCIES.
+    Currencies without a rate are reported in ``unconverted`` and left out of totals.
+    Category/date groupings are expressed in the base currency.
+    """
+    base_currency = base_currency.upper()
+    amounts = columns["amount"]
+    codes = columns["currency"]
+
+    native = _grouped_sum(codes, amounts)
+    native.pop("", None)
+    ordered = list(DISPLAY_CURRENCIES) + sorted(c for c in native if c not in DISPLAY_CURRENCIES)
+    subtotals = {c: native.get(c, 0.0) for c in ordered}
+
+    unconverted = [c for c, v in subtotals.items() if c not in rates and v]
+    targets = [c for c in dict.fromkeys(list(DISPLAY_CURRENCIES) + [base_currency]) if c in rates]
+    totals = {
+        t: sum(v * rates[t] / rates[c] for c, v in subtotals.items() if c in rates)
+        for t in targets
+    }
+
+    result = ReportTotals(base_currency, subtotals, totals, unconverted)
+    if (by_category or by_date) and base_currency in rates:
+        in_base, known = convert_many(amounts, codes, base_currency, rates, return_mask=True)
+        in_base = np.where(known, in_base, 0.0)
+        if by_category:
+            result.by_category = _grouped_sum(columns["category"], in_base)
+        if by_date:
+            result.by_date = _grouped_sum(columns["date"], in_base)
+    return result
+
+
+def totals_for_entries(
+    entries: Sequence[ExpenseEntry],
+    header: ReportHeader,
+    usd_to_mxn: Optional[float] = None,
+    rates: Optional[Dict[str, float]] = None,
+    **kwargs,
+) -> ReportTotals:
+    """``rates`` (units per 1 USD) covers currencies beyond the header's USD/MXN."""
+    fx = header.fx_usd_to_mxn if usd_to_mxn is None else usd_to_mxn
+    return compute_totals(entry_columns(entries), header.base_currency, header_rates(fx, rates), **kwargs)
+
+
+def totals_for_frame(
+    df: pd.DataFrame,
+    header: ReportHeader,
+    rates: Optional[Dict[str, float]] = None,
+    **kwargs,
+) -> ReportTotals:
+    return compute_totals(
+        frame_columns(df), header.base_currency, header_rates(header.fx_usd_to_mxn, rates), **kwargs
+    )
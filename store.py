@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+from xpenseit.models import ExpenseEntry
+
+
+# Same columns, in the same order, as ExpenseEntry.to_row().
+COLUMNS: List[str] = list(ExpenseEntry().to_row().keys())
+_FLOAT_COLUMNS = {"Total"}
+
+
+class ExpenseStore:
+    """
+    Columnar collection of expense rows with an id -> row index.
+
+    Each column is a preallocated NumPy array grown by doubling, so appends are
+    amortized O(1), updates touch one slot and deletes swap the last row into the
+    hole (row order is therefore not stable across deletes). ``to_frame`` wraps the
+    live arrays without copying (text columns stay ``object`` dtype), so it costs
+    O(columns) per rerun; treat it as a read-only view that later writes show through.
+    """
+
+    def __init__(self, entries: Optional[Iterable[ExpenseEntry]] = None, capacity: int = 64):
+        capacity = max(1, int(capacity))
+        self._cols: Dict[str, np.ndarray] = {c: self._empty(c, capacity) for c in COLUMNS}
+        self._index: Dict[str, int] = {}
+        self._size = 0
+        if entries is not None:
+            self.extend(entries)
+
+    @staticmethod
+    def _empty(column: str, capacity: int) -> np.ndarray:
+        if column in _FLOAT_COLUMNS:
+            return np.full(capacity, np.nan, dtype=float)
+        return np.full(capacity, "", dtype=object)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._index
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._cols["ID"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for c, arr in self._cols.items():
+            grown = self._empty(c, capacity)
+            grown[: self._size] = arr[: self._size]
+            self._cols[c] = grown
+
+    def _write(self, row: int, values: Dict[str, Any]) -> None:
+        for c, v in values.items():
+            if c not in self._cols:
+                raise KeyError(f"Unknown column: {c}")
+            if c in _FLOAT_COLUMNS:
+                v = np.nan if v in ("", None) else float(v)
+            elif v is None:
+                v = ""
+            self._cols[c][row] = v
+
+    def append(self, entry: ExpenseEntry) -> None:
+        if entry.id in self._index:
+            raise ValueError(f"Duplicate expense id: {entry.id}")
+        self._grow(self._size + 1)
+        self._write(self._size, entry.to_row())
+        self._index[entry.id] = self._size
+        self._size += 1
+
+    def extend(self, entries: Iterable[ExpenseEntry]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def update(self, entry: Union[ExpenseEntry, str], **values: Any) -> None:
+        """Overwrite a row from an entry, or set named columns for an id."""
+        entry_id = entry if isinstance(entry, str) else entry.id
+        row = self._index[entry_id]
+        if not isinstance(entry, str):
+            values = {**entry.to_row(), **values}
+        values.pop("ID", None)
+        self._write(row, values)
+
+    def delete(self, entry_id: str) -> None:
+        row = self._index.pop(entry_id)
+        last = self._size - 1
+        for c, arr in self._cols.items():
+            if row != last:
+                arr[row] = arr[last]
+            arr[last] = np.nan if c in _FLOAT_COLUMNS else ""
+        if row != last:
+            self._index[self._cols["ID"][row]] = row
+        self._size = last
+
+    def row(self, entry_id: str) -> Dict[str, Any]:
+        i = self._index[entry_id]
+        return {c: arr[i] for c, arr in self._cols.items()}
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._size):
+            yield {c: arr[i] for c, arr in self._cols.items()}
+
+    def column(self, name: str) -> np.ndarray:
+        """View (not a copy) of one live column."""
+        return self._cols[name][: self._size]
+
+    def to_frame(self) -> pd.DataFrame:
+        # An explicit dtype per Series keeps pandas from inferring (and copying into)
+        # its string dtype, so text columns are views just like ``Total``.
+        columns = {c: self.column(c) for c in COLUMNS}
+        return pd.DataFrame(
+            {c: pd.Series(arr, dtype=arr.dtype, copy=False) for c, arr in columns.items()}, copy=False
+        )
@@ -0,0 +1,105 @@
+import importlib.util
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The repository root is the ``xpenseit`` package; make it importable under that
+# name when the checkout directory is called something else.
+try:
+    import xpenseit  # noqa: F401
+except ImportError:
+    spec = importlib.util.spec_from_file_location(
+        "xpenseit", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["xpenseit"] = module
+    spec.loader.exec_module(module)
+
+
+REPLY = {
+    "merchant_name": "Cafe Sol",
+    "transaction_date": "2025-03-12",
+    "transaction_time": "14:05",
+    "total_amount": "1,234.50",
+    "currency_code": "$",
+    "payment_method": "Cash",
+    "category": "Food & Meals",
+}
+
+
+class StubChat:
+    """
+    Local chat-completions endpoint recording the client ports it saw. The first
+    ``rate_limited`` requests are answered 429 with a ``retry-after`` header.
+    """
+
+    def __init__(self, rate_limited: int = 0, retry_after: float = 0.05):
+        self.ports = set()
+        self.requests = 0
+        self.throttled = 0
+        self.rate_limited = rate_limited
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.ports.add(self.client_address[1])
+                    throttle = stub.throttled < stub.rate_limited
+                    if throttle:
+                        stub.throttled += 1
+                if throttle:
+                    body = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+                    self.send_response(429)
+                    self.send_header("retry-after", str(retry_after))
+                else:
+                    body = json.dumps(
+                        {
+                            "id": "x",
+                            "object": "chat.completion",
+                            "created": 0,
+                            "model": "stub",
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "finish_reason": "stop",
+                                    "message": {"role": "assistant", "content": json.dumps(REPLY)},
+                                }
+                            ],
+                            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                        }
+                    ).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_chat(request):
+    # Parametrize indirectly with a count to have that many requests rate limited.
+    server = StubChat(rate_limited=getattr(request, "param", 0))
+    yield server
+    server.close()
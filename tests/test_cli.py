@@ -0,0 +1,60 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("openai")
+PIL = pytest.importorskip("PIL.Image")
+
+from xpenseit.cli import main  # noqa: E402
+from xpenseit.services.journal import IngestJournal, file_key  # noqa: E402
+
+
+def _receipts(folder, count):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        buf = io.BytesIO()
+        PIL.new("RGB", (64, 96), (255, 255 - i, 255)).save(buf, format="PNG")
+        with open(os.path.join(folder, f"r{i}.png"), "wb") as fh:
+            fh.write(buf.getvalue())
+
+
+def _run(tmp_path, *extra):
+    return main([str(tmp_path / "in"), "--out", str(tmp_path / "out"), "--formats", "csv", *extra])
+
+
+def test_cli_runs_against_keyless_local_endpoint(tmp_path, monkeypatch, stub_chat):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    _receipts(tmp_path / "in", 5)
+    assert _run(tmp_path, "--base-url", stub_chat.url, "--concurrency", "2") == 0
+    df = pd.read_csv(tmp_path / "out" / "expenses.csv")
+    assert len(df) == 5
+    assert df["Total"].tolist() == [1234.5] * 5
+    journal = IngestJournal(str(tmp_path / "out" / "journal.sqlite3"))
+    path = tmp_path / "in" / "r0.png"
+    assert journal.completed_items(file_key(str(path), "r0.png")) is not None
+    journal.close()
+
+
+def test_cli_reports_missing_api_key_cleanly(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    _receipts(tmp_path / "in", 1)
+    assert _run(tmp_path) == 1
+    assert "Vision client error" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("flag", ["--concurrency", "--pack-size", "--dpi"])
+def test_cli_rejects_non_positive_sizes(tmp_path, flag):
+    with pytest.raises(SystemExit):
+        _run(tmp_path, flag, "0")
+
+
+def test_resumed_run_keeps_entry_ids(tmp_path, stub_chat):
+    _receipts(tmp_path / "in", 3)
+    assert _run(tmp_path, "--base-url", stub_chat.url) == 0
+    first = pd.read_csv(tmp_path / "out" / "expenses.csv")["ID"].tolist()
+    requests = stub_chat.requests
+    assert _run(tmp_path, "--base-url", stub_chat.url) == 0
+    assert stub_chat.requests == requests
+    assert pd.read_csv(tmp_path / "out" / "expenses.csv")["ID"].tolist() == first
@@ -0,0 +1,82 @@
+import pytest
+
+from xpenseit.services import normalize
+from xpenseit.services.normalize import find_currency, infer_currency
+
+
+# (receipt text, expected currency or None when the text names none)
+LABELED_TEXTS = [
+    ("Hotel Marriott\nRoom charges $120.00\nTaxes/Fees $15.00\nTotal $135.00", "USD"),
+    ("Items/Qty 2 USD 4.00", "USD"),
+    ("OXXO S.A. de C.V.\nTOTAL $ 87.50\nIVA 16%", "MXN"),
+    ("Restaurante El Sol\nTotal 350.00 M.N.", "MXN"),
+    ("TOTAL MX$1,234.56", "MXN"),
+    ("Taxi Lima\nTotal S/ 45.00", "PEN"),
+    ("Padaria\nTotal R$ 32,90", "BRL"),
+    ("Cafe Toronto\nTotal $12.00", "CAD"),
+    ("Brasserie Paris\nTotal 18,50 €", "EUR"),
+    ("Pub London\nTotal £9.40", "GBP"),
+    ("Ramen Tokyo\n¥1,200", "JPY"),
+    ("Airline folio\nFare/Taxes 210.00\nTotal US$ 240.00", "USD"),
+    ("Gas/Fuel pump 3\nAmount 40.00", None),
+    ("Reserva/Booking ref ABC123", None),
+    ("Corsa/Crs 12", None),
+]
+
+# (value reported by Vision, merchant hint, expected)
+LABELED_VALUES = [
+    ("$", None, "USD"),
+    ("$", "OXXO S.A. de C.V.", "MXN"),
+    ("MX$", None, "MXN"),
+    ("usd", None, "USD"),
+    ("M.N.", None, "MXN"),
+    ("Pesos mexicanos", None, "MXN"),
+    (None, "Restaurante, Guadalajara", "MXN"),
+    ("¥", "Tokyo Station", "JPY"),
+    ("kr", "Norge Kiosk", "NOK"),
+    ("R$", None, "BRL"),
+    ("S/", None, "PEN"),
+    ("€", None, "EUR"),
+    ("", None, "USD"),
+]
+
+
+@pytest.fixture(autouse=True)
+def _default_region():
+    normalize.set_region(normalize.DEFAULT_REGION)
+    yield
+    normalize.set_region(normalize.DEFAULT_REGION)
+
+
+def test_find_currency_accuracy_on_labeled_sample():
+    misses = [(text, want, find_currency(text)) for text, want in LABELED_TEXTS if find_currency(text) != want]
+    accuracy = 1 - len(misses) / len(LABELED_TEXTS)
+    assert accuracy == 1.0, misses
+
+
+def test_infer_currency_accuracy_on_labeled_sample():
+    misses = [
+        (value, hint, want, infer_currency(value, hint))
+        for value, hint, want in LABELED_VALUES
+        if infer_currency(value, hint) != want
+    ]
+    assert not misses
+
+
+def test_letter_symbols_need_an_adjacent_number():
+    assert find_currency("Taxes/Fees") is None
+    assert find_currency("Total S/45.00") == "PEN"
+    assert find_currency("45.00 S/") == "PEN"
+
+
+def test_region_prior_resolves_bare_dollar():
+    normalize.set_region("MX")
+    assert infer_currency("$") == "MXN"
+    assert infer_currency(None) == "MXN"
+    assert infer_currency("$", region="CA") == "CAD"
+    assert infer_currency("$", "Cafe Toronto") == "CAD"
+
+
+def test_unknown_region_is_rejected():
+    with pytest.raises(ValueError):
+        normalize.set_region("ZZ")
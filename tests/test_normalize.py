@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from xpenseit.services.normalize import parse_amount, parse_date, parse_time
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("MX$1,234.56", 1234.56),
+        ("1.234,56 €", 1234.56),
+        ("1 234,56", 1234.56),
+        ("€1.234", 1234.0),
+        ("1.234", 1234.0),
+        ("1,234", 1234.0),
+        ("0.125", 0.125),
+        ("12,50", 12.5),
+        ("(12.00)", -12.0),
+        ("USD 7", 7.0),
+        ("abc", None),
+        # Fast-path forms must agree with the general rules.
+        ("1,234.56", 1234.56),
+        ("$1234.56", 1234.56),
+        ("US$ 12.50", 12.5),
+        ("1.234.567,89", 1234567.89),
+        ("$-12.50", -12.5),
+        ("-12.50", -12.5),
+        (",50", 50.0),
+        ("1_000.00", 1.0),
+    ],
+)
+def test_parse_amount(raw, expected):
+    assert parse_amount(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("2025-03-12", date(2025, 3, 12)),
+        ("12/03/2025", date(2025, 3, 12)),
+        ("03/25/2025", date(2025, 3, 25)),
+        ("12 de marzo de 2025", date(2025, 3, 12)),
+        ("Jan 5, 2025", date(2025, 1, 5)),
+        ("31/02/2025", None),
+    ],
+)
+def test_parse_date(raw, expected):
+    assert parse_date(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [("2:05 pm", "14:05"), ("12:30 AM", "00:30"), ("14h05", "14:05"), ("25:00", None), ("09:15:30", "09:15"), ("23:59", "23:59")],
+)
+def test_parse_time(raw, expected):
+    assert parse_time(raw) == expected
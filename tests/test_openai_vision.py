@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("openai")
+
+from xpenseit.services import openai_vision  # noqa: E402
+from xpenseit.services.openai_vision import extract_many  # noqa: E402
+from xpenseit.services.scheduler import RequestScheduler, RetryPolicy  # noqa: E402
+
+
+def test_blocking_calls_reuse_one_pooled_client(stub_chat):
+    images = [(b"not-an-image-%d" % i, f"r{i}.png") for i in range(4)]
+    scheduler = RequestScheduler()
+    for _ in range(3):
+        results = extract_many(images, base_url=stub_chat.url, api_key="test", concurrency=1, scheduler=scheduler)
+        assert [r["error"] for r in results] == [None] * 4
+        assert results[0]["total_amount"] == 1234.5
+        assert results[0]["currency_code"] == "USD"
+    assert stub_chat.requests == 12
+    # Sequential requests on one keep-alive connection, across all three calls.
+    assert len(stub_chat.ports) == 1
+    loop = openai_vision._background_loop()
+    assert [k for k in openai_vision._ASYNC_CLIENTS[loop] if k[0] == stub_chat.url] == [(stub_chat.url, "test")]
+
+
+def test_failures_are_reported_per_item():
+    scheduler = RequestScheduler(policy=RetryPolicy(max_attempts=1))
+    results = extract_many([(b"x", "a.png")], base_url="http://127.0.0.1:9/v1", api_key="test", scheduler=scheduler)
+    assert results[0]["error"]
+    assert results[0]["source_name"] == "a.png"
+
+
+def test_finished_items_are_cached_before_the_batch_completes(tmp_path):
+    import asyncio
+    import base64
+    import json
+    from types import SimpleNamespace
+
+    from xpenseit.services.extraction_cache import ExtractionCache
+    from xpenseit.services.openai_vision import SYSTEM_PROMPT, extract_many_async, make_key
+    from xpenseit.services.normalize import current_region
+
+    stalled = asyncio.Event()
+
+    async def create(messages, **kwargs):
+        url = messages[0]["content"][1]["image_url"]["url"]
+        if base64.b64decode(url.split(",", 1)[1]) == b"slow":
+            await stalled.wait()
+        reply = json.dumps({"merchant_name": "Fast", "total_amount": 5})
+        usage = SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=usage)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+    batch = extract_many_async(
+        [(b"fast", "fast.png"), (b"slow", "slow.png")],
+        cache=cache,
+        preprocess=False,
+        scheduler=RequestScheduler(),
+        client=client,
+    )
+
+    async def interrupted():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batch, 0.5)
+
+    asyncio.run(interrupted())
+    cached = cache.get(make_key(b"fast", "gpt-4o-mini", SYSTEM_PROMPT, current_region()))
+    assert cached is not None and cached["merchant_name"] == "Fast"
+    assert cache.get(make_key(b"slow", "gpt-4o-mini", SYSTEM_PROMPT, current_region())) is None
+    cache.close()
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("fitz")
+
+from xpenseit.services.pdf_text import parse_receipt_text  # noqa: E402
+
+
+def test_invoice_number_is_not_taken_as_total():
+    fields, confidence = parse_receipt_text(
+        "Marriott Hotel\nInvoice 4839201\nDate 2025-03-12\nBalance: $170.00\nUSD"
+    )
+    assert fields["total_amount"] == 170.0
+    assert confidence < 0.7
+
+
+def test_item_count_total_does_not_beat_money_total():
+    fields, _ = parse_receipt_text("Cafe Sol\nTotal $12.00\nItems total 3\n2025-03-12")
+    assert fields["total_amount"] == 12.0
+
+
+def test_specific_keyword_beats_plain_total():
+    fields, confidence = parse_receipt_text(
+        "Restaurante El Sol\n2025-03-12\nTotal 100.00\nTotal savings 5.00\nAmount due 116.00\nMXN"
+    )
+    assert fields["total_amount"] == 116.0
+    assert confidence >= 0.7
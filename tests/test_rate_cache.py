@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from xpenseit.services.currency import RateCache
+
+
+class _StubRates:
+    """Local exchange-rate endpoint counting requests; ``delay``/``status`` are adjustable."""
+
+    def __init__(self):
+        self.hits = 0
+        self.delay = 0.0
+        self.status = 200
+        self.mxn = 17.5
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps({"rates": {"USD": 1.0, "MXN": stub.mxn, "EUR": 0.9}}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/latest"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = _StubRates()
+    yield server
+    server.close()
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_fresh_entry_is_served_from_memory_and_disk(stub, tmp_path):
+    path = str(tmp_path / "fx.json")
+    cache = RateCache(path, ttl=3600, api_url=stub.url)
+    assert cache.get("USD")["MXN"] == 17.5
+    assert cache.get("USD")["MXN"] == 17.5
+    assert stub.hits == 1
+
+    reloaded = RateCache(path, ttl=3600, api_url=stub.url)
+    assert reloaded.get("usd")["EUR"] == 0.9
+    assert stub.hits == 1
+
+
+def test_stale_entry_is_returned_while_one_refresh_runs(stub, tmp_path):
+    cache = RateCache(str(tmp_path / "fx.json"), ttl=3600, api_url=stub.url)
+    cache.get("USD")
+    cache.ttl = 0
+    stub.delay = 0.3
+    stub.mxn = 18.2
+
+    started = time.monotonic()
+    results = [cache.get("USD") for _ in range(20)]
+    assert time.monotonic() - started < 0.2
+    assert all(r["MXN"] == 17.5 for r in results)
+    # Twenty stale reads, one refresh in flight.
+    assert _wait_for(lambda: stub.hits == 2)
+    time.sleep(0.05)
+    assert stub.hits == 2
+
+    assert _wait_for(lambda: cache.get("USD")["MXN"] == 18.2)
+
+
+def test_refresh_failure_keeps_serving_cached_rates(stub, tmp_path):
+    cache = RateCache(str(tmp_path / "fx.json"), ttl=0, api_url=stub.url)
+    cache.get("USD")
+    stub.status = 500
+    assert cache.get("USD")["MXN"] == 17.5
+    assert _wait_for(lambda: not cache._inflight)
+    assert cache.get("USD")["MXN"] == 17.5
+
+
+def test_offline_without_cache_falls_back(tmp_path):
+    cache = RateCache(str(tmp_path / "fx.json"), api_url="http://127.0.0.1:9/latest", timeout=0.5)
+    assert cache.get("USD") == {"USD": 1.0, "MXN": 18.0}
+
+
+def test_non_blocking_get_schedules_refresh(stub, tmp_path):
+    cache = RateCache(str(tmp_path / "fx.json"), api_url=stub.url)
+    assert cache.get("USD", block=False) == {"USD": 1.0, "MXN": 18.0}
+    assert _wait_for(lambda: cache.get("USD", block=False)["MXN"] == 17.5)
+    assert stub.hits == 1
+
+
+def test_previous_day_entry_is_stale_and_old_days_are_pruned(stub, tmp_path):
+    path = tmp_path / "fx.json"
+    today = date.today()
+    old = {"fetched_at": time.time(), "rates": {"USD": 1.0, "MXN": 16.0}}
+    path.write_text(
+        json.dumps(
+            {
+                f"USD:{(today - timedelta(days=1)).isoformat()}": old,
+                f"USD:{(today - timedelta(days=30)).isoformat()}": old,
+            }
+        )
+    )
+    cache = RateCache(str(path), ttl=3600, api_url=stub.url, keep_days=7)
+    # Yesterday's rates are served immediately, then replaced in the background.
+    assert cache.get("USD")["MXN"] == 16.0
+    assert _wait_for(lambda: cache.get("USD")["MXN"] == 17.5)
+
+    saved = json.loads(path.read_text())
+    assert f"USD:{today.isoformat()}" in saved
+    assert f"USD:{(today - timedelta(days=1)).isoformat()}" in saved
+    assert f"USD:{(today - timedelta(days=30)).isoformat()}" not in saved
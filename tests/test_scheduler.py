@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from xpenseit.services.scheduler import CircuitBreaker, RequestScheduler, RetryPolicy, TokenBucket
+
+
+class _Response:
+    status_code = 429
+    headers = {"retry-after": "0.2"}
+
+
+class RateLimitError(Exception):
+    status_code = 429
+    response = _Response()
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+def _run_all(scheduler, call, n):
+    async def main():
+        return await asyncio.gather(*[scheduler.run(call) for _ in range(n)], return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_short_429_burst_does_not_trip_breaker():
+    started = time.monotonic()
+
+    async def call():
+        if time.monotonic() - started < 0.3:
+            raise RateLimitError()
+        return "ok"
+
+    scheduler = RequestScheduler(policy=RetryPolicy(base_delay=0.01), breaker=CircuitBreaker(3, 0.2))
+    results = _run_all(scheduler, call, 40)
+    assert results == ["ok"] * 40
+    assert scheduler.breaker.state == "closed"
+    assert scheduler.stats["rejected"] == 0
+
+
+def test_open_breaker_waits_for_recovery_instead_of_failing():
+    started = time.monotonic()
+
+    async def call():
+        if time.monotonic() - started < 0.5:
+            raise ServiceUnavailable()
+        return "ok"
+
+    scheduler = RequestScheduler(
+        policy=RetryPolicy(max_attempts=3, base_delay=0.01), breaker=CircuitBreaker(3, 0.2)
+    )
+    results = _run_all(scheduler, call, 20)
+    assert results == ["ok"] * 20
+    assert scheduler.stats["breaker_waits"] > 0
+
+
+def test_open_breaker_gives_up_after_max_open_wait():
+    async def call():
+        raise ServiceUnavailable()
+
+    scheduler = RequestScheduler(
+        policy=RetryPolicy(max_attempts=2, base_delay=0.01), breaker=CircuitBreaker(1, 10.0), max_open_wait=0.05
+    )
+    results = _run_all(scheduler, call, 3)
+    assert all(isinstance(r, Exception) for r in results)
+    assert scheduler.stats["rejected"] >= 1
+
+
+def test_scheduler_can_be_shared_across_event_loops():
+    async def call():
+        await asyncio.sleep(0)
+        return "ok"
+
+    scheduler = RequestScheduler()
+    # A tiny bucket forces calls to queue on its lock in every loop.
+    scheduler.requests = TokenBucket(6000, capacity=2)
+    for _ in range(2):
+        assert _run_all(scheduler, call, 10) == ["ok"] * 10
+
+
+@pytest.mark.parametrize("stub_chat", [12], indirect=True)
+def test_http_429s_are_retried_through_extract_many(stub_chat):
+    pytest.importorskip("openai")
+    from xpenseit.services.openai_vision import extract_many
+
+    images = [(b"receipt-%d" % i, f"r{i}.png") for i in range(8)]
+    scheduler = RequestScheduler(policy=RetryPolicy(max_attempts=8, base_delay=0.01), breaker=CircuitBreaker(3, 5.0))
+    started = time.monotonic()
+    results = extract_many(images, base_url=stub_chat.url, api_key="test", scheduler=scheduler, preprocess=False)
+    elapsed = time.monotonic() - started
+    assert [r["error"] for r in results] == [None] * 8
+    assert stub_chat.requests == 8 + 12
+    assert scheduler.stats["rate_limited"] == 12
+    assert scheduler.stats["failures"] == 0
+    assert scheduler.breaker.state == "closed"
+    # The server's retry-after (50 ms) bounds each backoff from below.
+    assert elapsed >= 0.05
+
+
+@pytest.mark.parametrize("stub_chat", [2], indirect=True)
+def test_single_extraction_goes_through_the_scheduler(stub_chat):
+    pytest.importorskip("openai")
+    from xpenseit.services.openai_vision import extract_expense_fields
+
+    scheduler = RequestScheduler(policy=RetryPolicy(base_delay=0.01))
+    result = extract_expense_fields(
+        b"receipt", "r.png", base_url=stub_chat.url, api_key="test", scheduler=scheduler, preprocess=False
+    )
+    assert result["error"] is None
+    assert result["total_amount"] == 1234.5
+    assert scheduler.stats["rate_limited"] == 2
+    assert scheduler.stats["calls"] == 3
+
+
+def test_default_scheduler_is_shared_between_calls():
+    pytest.importorskip("openai")
+    from xpenseit.services.openai_vision import default_scheduler
+
+    assert default_scheduler() is default_scheduler()
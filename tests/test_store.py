@@ -0,0 +1,30 @@
+import numpy as np
+
+from xpenseit.models import ExpenseEntry
+from xpenseit.store import COLUMNS, ExpenseStore
+
+
+def _store(n):
+    return ExpenseStore(
+        ExpenseEntry(merchant_name=f"Merchant {i}", total_amount=float(i), currency_code="MXN") for i in range(n)
+    )
+
+
+def test_to_frame_shares_every_column():
+    store = _store(100)
+    df = store.to_frame()
+    assert list(df.columns) == COLUMNS
+    assert len(df) == 100
+    for c in COLUMNS:
+        assert np.shares_memory(df[c].to_numpy(), store.column(c)), c
+
+
+def test_update_and_delete_keep_index_consistent():
+    entries = [ExpenseEntry(merchant_name=f"M{i}", total_amount=float(i)) for i in range(5)]
+    store = ExpenseStore(entries)
+    store.update(entries[1].id, **{"Merchant": "Renamed"})
+    store.delete(entries[0].id)
+    assert len(store) == 4
+    assert store.row(entries[1].id)["Merchant"] == "Renamed"
+    assert store.row(entries[4].id)["Total"] == 4.0
+    assert sorted(store.to_frame()["Total"]) == [1.0, 2.0, 3.0, 4.0]
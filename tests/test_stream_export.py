@@ -0,0 +1,56 @@
+import io
+import json
+import tracemalloc
+
+import pandas as pd
+
+from xpenseit.models import ExpenseEntry
+from xpenseit.services.stream_export import iter_csv, iter_ndjson, write_chunks
+from xpenseit.store import COLUMNS, ExpenseStore
+
+
+def _entries(n):
+    for i in range(n):
+        yield ExpenseEntry(
+            merchant_name=f"Merchant {i}, Inc.",
+            total_amount=None if i % 7 == 0 else i + 0.25,
+            currency_code="MXN",
+            notes='say "hi"',
+        )
+
+
+def test_csv_chunks_round_trip():
+    chunks = list(iter_csv(_entries(2500), chunk_rows=1000))
+    assert len(chunks) == 3
+    df = pd.read_csv(io.BytesIO(b"".join(chunks)), keep_default_na=False)
+    assert list(df.columns) == COLUMNS
+    assert len(df) == 2500
+    assert df.loc[1, "Merchant"] == "Merchant 1, Inc."
+    assert df.loc[1, "Notes"] == 'say "hi"'
+    assert df.loc[0, "Total"] == ""
+
+
+def test_ndjson_from_store_writes_nulls():
+    store = ExpenseStore(_entries(10))
+    out = io.BytesIO()
+    written = write_chunks(iter_ndjson(store, chunk_rows=4), out)
+    assert written == len(out.getvalue())
+    rows = [json.loads(line) for line in out.getvalue().decode("utf-8").splitlines()]
+    assert len(rows) == 10
+    assert rows[0]["Total"] is None
+    assert rows[1]["Total"] == 1.25
+
+
+def _peak_bytes(n):
+    tracemalloc.start()
+    try:
+        for _ in iter_csv(_entries(n), chunk_rows=500):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_csv_peak_memory_does_not_grow_with_rows():
+    small, large = _peak_bytes(2_000), _peak_bytes(20_000)
+    assert large < small * 1.5
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import io
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 import pandas as pd
 import streamlit as st
 from PIL import Image
 
 from xpenseit.models import ExpenseEntry, ReportHeader, DEFAULT_CATEGORIES, DEFAULT_PAYMENT_METHODS
+from xpenseit.services.blob_store import BlobStore
+from xpenseit.services.exports import get_download_bytes
+from xpenseit.services.extraction_cache import image_digest
+from xpenseit.services.thumbnails import ThumbnailCache
+from xpenseit.services.totals import ReportTotals
+from xpenseit.store import ExpenseStore
 from pandas import ExcelWriter
 import datetime as _dt
 
 
+# Module-level so thumbnails survive Streamlit reruns.
+_THUMBNAILS = ThumbnailCache()
+
+
 def render_header_form(state_key: str = "header") -> ReportHeader:
     st.subheader("Report Header")
     cols = st.columns(3)
@@ -36,9 +46,13 @@ def render_header_form(state_key: str = "header") -> ReportHeader:
     )
 
 
-def render_expenses_table(entries: List[ExpenseEntry]) -> pd.DataFrame:
+def render_expenses_table(entries: Union[List[ExpenseEntry], ExpenseStore]) -> pd.DataFrame:
     st.subheader("Expenses")
-    df = pd.DataFrame([e.to_row() for e in entries])
+    if isinstance(entries, ExpenseStore):
+        # Columnar store: wrap the live arrays instead of rebuilding rows.
+        df = entries.to_frame()
+    else:
+        df = pd.DataFrame([e.to_row() for e in entries])
     if df.empty:
         st.info("No expenses yet. Upload images or PDFs to get started.")
         return df
@@ -59,60 +73,35 @@ def render_expenses_table(entries: List[ExpenseEntry]) -> pd.DataFrame:
     return edited
 
 
-def render_image_gallery(entries: List[ExpenseEntry]):
+def render_image_gallery(
+    entries: List[ExpenseEntry],
+    store: BlobStore | None = None,
+    page_size: int = 12,
+    thumb_width: int = 320,
+):
+    entries = [e for e in entries if e.has_image and (e._image_bytes or store is not None)]
     if not entries:
         return
     st.subheader("Receipts Preview")
+    pages = max(1, -(-len(entries) // page_size))
+    page = 1
+    if pages > 1:
+        page = int(st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key="gallery_page"))
+    visible = entries[(page - 1) * page_size : page * page_size]
     cols = st.columns(3)
-    for i, entry in enumerate(entries):
-        if entry._image_bytes:
-            with cols[i % 3]:
-                st.caption(entry.source_name or "Receipt")
-                st.image(entry._image_bytes, width='stretch')
-
-
-def get_download_bytes(df: pd.DataFrame, header: ReportHeader) -> Dict[str, bytes]:
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
-    json_bytes = df.to_json(orient="records", indent=2).encode("utf-8")
-    # Excel
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        # Summary sheet with totals similar to PDF
-        summary_rows = [
-            ["Reporter", header.reporter_name],
-            ["Date", header.report_date.isoformat()],
-            ["Trip Purpose", header.trip_purpose],
-            ["Client", header.client],
-            ["Visit Type", header.visit_type],
-            ["Base Currency", header.base_currency],
-            ["FX (1 USD)", f"{header.fx_usd_to_mxn:.4f} MXN"],
-        ]
-        summary = pd.DataFrame(summary_rows, columns=["Field", "Value"])
-        summary.to_excel(writer, index=False, sheet_name="Summary")
-
-        # Expenses sheet
-        df.to_excel(writer, index=False, sheet_name="Expenses")
-
-        # Totals sheet
-        safe = df.copy()
-        if not safe.empty:
-            safe["Currency"] = safe["Currency"].astype(str).str.upper()
-            safe["_TotalNum"] = pd.to_numeric(safe["Total"], errors="coerce").fillna(0.0)
-            usd_sub = safe.loc[safe["Currency"] == "USD", "_TotalNum"].sum()
-            mxn_sub = safe.loc[safe["Currency"] == "MXN", "_TotalNum"].sum()
-        else:
-            usd_sub = 0.0
-            mxn_sub = 0.0
-        total_usd = usd_sub + (mxn_sub / (header.fx_usd_to_mxn or 1))
-        total_mxn = mxn_sub + (usd_sub * (header.fx_usd_to_mxn or 1))
-        totals = pd.DataFrame([
-            ["Subtotal USD", f"{usd_sub:,.2f} USD"],
-            ["Subtotal MXN", f"{mxn_sub:,.2f} MXN"],
-            ["Total USD", f"{total_usd:,.2f} USD"],
-            ["Total MXN", f"{total_mxn:,.2f} MXN"],
-        ], columns=["Metric", "Value"])
-        totals.to_excel(writer, index=False, sheet_name="Totals")
-    xlsx_bytes = output.getvalue()
-    return {"csv": csv_bytes, "json": json_bytes, "xlsx": xlsx_bytes}
-
-
+    for i, entry in enumerate(visible):
+        image_hash = entry._image_ref or image_digest(entry._image_bytes)
+        thumb = _THUMBNAILS.get(image_hash, thumb_width, lambda e=entry: e.image_bytes(store))
+        with cols[i % 3]:
+            st.caption(entry.source_name or "Receipt")
+            st.image(thumb, width='stretch')
+
+
+def render_totals(totals: ReportTotals):
+    st.subheader("Totals")
+    cols = st.columns(max(1, len(totals.totals)))
+    for col, (ccy, value) in zip(cols, totals.totals.items()):
+        with col:
+            st.metric(f"Total {ccy}", f"{value:,.2f}")
+    if totals.unconverted:
+        st.caption(f"No FX rate for: {', '.join(totals.unconverted)} (excluded from totals)")